@@ -9,6 +9,8 @@ class AppConstants:
 
     ESI_LIMIT_PER_HOST: typing.Final = 5
     ESI_ERROR_SLEEP_TIME: typing.Final = 7
+    ESI_ERROR_SLEEP_MAX: typing.Final = 30
+    ESI_ERROR_SLEEP_JITTER: typing.Final = 0.5
     ESI_ERROR_RETRY_COUNT: typing.Final = 11
 
     # ESI throws off a 504 at daily restart, so let's double the retry
@@ -21,6 +23,7 @@ class AppConstants:
     MAGIC_ADMINS: typing.Final = {}
     MAGIC_CONTRIBUTORS: typing.Final = {}
     MAGIC_SUSPECTS: typing.Final = {}
+    MAGIC_ADMINS_OR_CONTRIBUTORS: typing.Final = frozenset(MAGIC_ADMINS | MAGIC_CONTRIBUTORS)
 
     MARKET_REGION: typing.Final = 10000002
     MARKET_REFRESH_INTERVAL_SECONDS: typing.Final = 6 * 3600
@@ -5,6 +5,7 @@ import logging
 import typing
 
 import sqlalchemy
+import sqlalchemy.engine
 import sqlalchemy.ext.asyncio
 import sqlalchemy.ext.asyncio.engine
 import sqlalchemy.orm
@@ -180,6 +181,9 @@ class AppTables:
 
     class Structure(Base):
         __tablename__: typing.Final = "app_structure"
+        __table_args__: typing.Final = (
+            sqlalchemy.Index("ix_app_structure_fuel_expires", "fuel_expires", postgresql_where=sqlalchemy.column("fuel_expires") != sqlalchemy.sql.expression.null()),
+        )
         timestamp: sqlalchemy.orm.Mapped[datetime.datetime] = sqlalchemy.orm.mapped_column(server_default=sqlalchemy.sql.func.now(), onupdate=sqlalchemy.sql.func.now(), nullable=False)
         character_id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(nullable=False)
         corporation_id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(sqlalchemy.ForeignKey("esi_corporations.corporation_id"), nullable=False)
@@ -247,6 +251,10 @@ class AppTables:
 
     class ScheduledExtraction(Base):
         __tablename__: typing.Final = "app_scheduled_extraction"
+        __table_args__: typing.Final = (
+            sqlalchemy.Index("ix_app_scheduled_extraction_moon_arrival", "moon_id", "chunk_arrival_time"),
+            sqlalchemy.Index("ix_app_scheduled_extraction_decay_arrival", "natural_decay_time", "chunk_arrival_time"),
+        )
         timestamp: sqlalchemy.orm.Mapped[datetime.datetime] = sqlalchemy.orm.mapped_column(server_default=sqlalchemy.sql.func.now(), onupdate=sqlalchemy.sql.func.now(), nullable=False)
         character_id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(nullable=False)
         corporation_id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(sqlalchemy.ForeignKey("esi_corporations.corporation_id"), nullable=False)
@@ -265,6 +273,9 @@ class AppTables:
 
     class CompletedExtraction(Base):
         __tablename__: typing.Final = "app_completed_extraction"
+        __table_args__: typing.Final = (
+            sqlalchemy.Index("ix_app_completed_extraction_decay_arrival", "belt_decay_time", "chunk_arrival_time"),
+        )
         timestamp: sqlalchemy.orm.Mapped[datetime.datetime] = sqlalchemy.orm.mapped_column(server_default=sqlalchemy.sql.func.now(), onupdate=sqlalchemy.sql.func.now(), nullable=False)
         character_id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(nullable=False)
         corporation_id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(sqlalchemy.ForeignKey("esi_corporations.corporation_id"), nullable=False)
@@ -284,6 +295,9 @@ class AppTables:
 
     class ExtractionHistory(Base):
         __tablename__: typing.Final = "app_extraction_history"
+        __table_args__: typing.Final = (
+            sqlalchemy.Index("ix_app_extraction_history_moon_arrival", "moon_id", "chunk_arrival_time", postgresql_where=sqlalchemy.column(sqlalchemy.sql.quoted_name("exists", quote=True)) == sqlalchemy.sql.expression.true()),
+        )
         id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(sqlalchemy.Sequence("app_extraction_history_id_seq", start=1), primary_key=True, unique=True)
         exists: sqlalchemy.orm.Mapped[bool] = sqlalchemy.orm.mapped_column(nullable=False)
         timestamp: sqlalchemy.orm.Mapped[datetime.datetime] = sqlalchemy.orm.mapped_column(server_default=sqlalchemy.sql.func.now(), onupdate=sqlalchemy.sql.func.now(), nullable=False)
@@ -450,6 +464,9 @@ class AppTables:
 
     class AccessHistory(Base):
         __tablename__: typing.Final = "app_access_history"
+        __table_args__: typing.Final = (
+            sqlalchemy.Index("ix_app_access_history_character_permitted_timestamp", "character_id", "permitted", "timestamp"),
+        )
         id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(sqlalchemy.Sequence("app_access_history_id_seq", start=1), primary_key=True, unique=True)
         timestamp: sqlalchemy.orm.Mapped[datetime.datetime] = sqlalchemy.orm.mapped_column(server_default=sqlalchemy.sql.func.now(), onupdate=sqlalchemy.sql.func.now(), nullable=False)
         character_id: sqlalchemy.orm.Mapped[int] = sqlalchemy.orm.mapped_column(nullable=False)
@@ -473,7 +490,18 @@ class AppDatabase:
     logger: logging.Logger
 
     def __init__(self, url: str, logger: logging.Logger, /, echo: bool = False) -> None:
-        self.engine: typing.Final = sqlalchemy.ext.asyncio.create_async_engine(url, echo=echo, pool_size=4, max_overflow=4)
+        connect_args: typing.Final = dict()
+        if sqlalchemy.engine.make_url(url).get_driver_name() == "asyncpg":
+            connect_args.update({
+                "server_settings": {"application_name": "esi-sso-quart", "jit": "off"},
+                "statement_cache_size": 2048,
+            })
+
+        self.engine: typing.Final = sqlalchemy.ext.asyncio.create_async_engine(
+            url, echo=echo,
+            pool_size=20, max_overflow=10, pool_recycle=1800, pool_pre_ping=False,
+            connect_args=connect_args
+        )
         self.logger: typing.Final = logger
         self._sessionmaker = None
         self._initialized = False
@@ -482,8 +510,17 @@ class AppDatabase:
         if not self._initialized:
             async with self.engine.begin() as transaction:
                 await transaction.run_sync(AppTables.Base.metadata.create_all)
+                await transaction.run_sync(self._create_indexes)
             self._initialized = True
 
+    @staticmethod
+    def _create_indexes(connection: sqlalchemy.engine.Connection) -> None:
+        # create_all() skips tables that already exist, so indexes added to
+        # an existing table have to be created separately.
+        for table in AppTables.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
     @otel
     async def sessionmaker(self) -> sqlalchemy.ext.asyncio.AsyncSession:
         if self._sessionmaker is None:
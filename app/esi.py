@@ -2,15 +2,22 @@ import asyncio
 import contextlib
 import dataclasses
 import datetime
+import email.utils
+import functools
 import http
-import inspect
-import json
+import itertools
 import logging
+import os
+import random
+import threading
+import time
 import typing
 
 import aiohttp
 import aiohttp.client_exceptions
-import dateutil.parser
+import cachetools
+import multidict
+import orjson
 import redis.asyncio
 import yarl
 
@@ -19,6 +26,19 @@ from support.telemetry import otel, otel_add_error
 from .constants import AppConstants
 
 
+_FAIL_FAST_GET: typing.Final = frozenset({http.HTTPStatus.BAD_REQUEST, http.HTTPStatus.FORBIDDEN})
+_FAIL_FAST_POST: typing.Final = frozenset({http.HTTPStatus.BAD_REQUEST, http.HTTPStatus.FORBIDDEN, http.HTTPStatus.UNAUTHORIZED})
+_OK_OR_NOT_MODIFIED: typing.Final = frozenset({http.HTTPStatus.OK, http.HTTPStatus.NOT_MODIFIED})
+
+
+@functools.lru_cache(maxsize=4096)
+def _redis_url_str(url: str, params_key: tuple) -> str:
+    u = yarl.URL(url)
+    if params_key:
+        return str(u.update_query(dict(params_key)))
+    return str(u)
+
+
 @dataclasses.dataclass(frozen=True)
 class AppESIResult:
     status: http.HTTPStatus
@@ -27,285 +47,347 @@ class AppESIResult:
 
 class AppESI:
 
+    AUTHORIZATION: typing.Final = 'Authorization'
     IF_NON_MATCH: typing.Final = 'If-None-Match'
     ETAG: typing.Final = 'ETag'
     EXPIRES: typing.Final = 'Expires'
     PAGES: typing.Final = 'X-Pages'
+    RETRY_AFTER: typing.Final = 'Retry-After'
     KV_LIFETIME: typing.Final = 3600
+    LOCAL_CACHE_SIZE: typing.Final = 4096
+    LOCAL_CACHE_LIFETIME: typing.Final = 60
+
+    REDIS_URL: typing.Final = "redis://127.0.0.1/1"
+    REDIS_MAX_CONNECTIONS: typing.Final = 32
+    REDIS_HEALTH_CHECK_INTERVAL: typing.Final = 30
 
     SELF: typing.ClassVar = None
+    SELF_LOCK: typing.ClassVar = threading.Lock()
 
     @classmethod
     def factory(cls, logger: logging.Logger, /):
-        if cls.SELF is None:
-            redis_pool: typing.Final = redis.asyncio.ConnectionPool.from_url("redis://127.0.0.1/1", decode_responses=True)
-            cls.SELF = cls(redis_pool, logger)
+        with cls.SELF_LOCK:
+            if cls.SELF is None:
+                redis_pool: typing.Final = redis.asyncio.ConnectionPool.from_url(
+                    os.getenv("ESI_REDIS_URL", cls.REDIS_URL),
+                    max_connections=cls.REDIS_MAX_CONNECTIONS,
+                    health_check_interval=cls.REDIS_HEALTH_CHECK_INTERVAL
+                )
+                cls.SELF = cls(redis_pool, logger)
         return cls.SELF
 
     redis_pool: redis.asyncio.ConnectionPool
+    rc: redis.asyncio.Redis
+    http_session: aiohttp.ClientSession | None
+    local_cache: cachetools.TTLCache
     logger: logging.Logger
 
     def __init__(self, redis_pool: redis.asyncio.ConnectionPool, logger: logging.Logger, /) -> None:
         self.redis_pool: typing.Final = redis_pool
+        self.rc: typing.Final = redis.asyncio.Redis(connection_pool=redis_pool)
+        self.http_session = None
+        self.local_cache: typing.Final = cachetools.TTLCache(maxsize=self.LOCAL_CACHE_SIZE, ttl=self.LOCAL_CACHE_LIFETIME)
         self.logger: typing.Final = logger
 
-    async def url(self, url: str, params: dict = None) -> yarl.URL:
-        u = yarl.URL(url)
-        if params:
-            return u.update_query(params)
-        return u
-
-    @otel
-    async def get(self, http_session: aiohttp.ClientSession, url: str, /, request_headers: dict = None, request_params: dict = None) -> AppESIResult:
-
-        request_headers = request_headers or dict()
-
-        redis_url: typing.Final = await self.url(url, request_params)
-        etag_key: typing.Final = f"etag:{redis_url!s}"
-        json_key: typing.Final = f"json:{redis_url!s}"
-
-        previous_json: dict = None
-        with contextlib.suppress(redis.RedisError):
-            async with redis.asyncio.Redis.from_pool(self.redis_pool) as rc:
-                pv: typing.Final = await rc.get(json_key)
-                if pv:
-                    previous_json = await asyncio.to_thread(json.loads, pv)
-
-        previous_etag: str = None
-        with contextlib.suppress(redis.RedisError):
-            async with redis.asyncio.Redis.from_pool(self.redis_pool) as rc:
-                previous_etag = await rc.get(etag_key)
-                if previous_etag is not None and previous_json is not None:
-                    request_headers[self.IF_NON_MATCH] = previous_etag
+    async def close(self) -> None:
+        if self.http_session is not None:
+            await self.http_session.close()
+            self.http_session = None
+        await self.rc.aclose()
+
+    def shared_http_session(self) -> aiohttp.ClientSession:
+        if self.http_session is None or self.http_session.closed:
+            connector: typing.Final = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=AppConstants.ESI_LIMIT_PER_HOST,
+                use_dns_cache=True,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True,
+            )
+            self.http_session = aiohttp.ClientSession(connector=connector)
+        return self.http_session
+
+    def retry_delay(self, attempts_remaining: int, response: aiohttp.ClientResponse | None = None) -> float:
+        attempt: typing.Final = AppConstants.ESI_ERROR_RETRY_COUNT - attempts_remaining - 1
+        delay = min(AppConstants.ESI_ERROR_SLEEP_MAX, AppConstants.ESI_ERROR_SLEEP_TIME * (2 ** attempt))
+        if response is not None:
+            retry_after: typing.Final = response.headers.get(self.RETRY_AFTER, '')
+            if retry_after.isdigit():
+                delay = min(float(retry_after), AppConstants.ESI_ERROR_SLEEP_MAX)
+            else:
+                delay = max(delay, AppConstants.ESI_ERROR_SLEEP_TIME * AppConstants.ESI_ERROR_SLEEP_MODIFIERS.get(response.status, 1))
+        return delay * (1 + random.random() * AppConstants.ESI_ERROR_SLEEP_JITTER)
+
+    def cache_lifetime(self, response_expires: str | None) -> int:
+        if response_expires:
+            lifetime = email.utils.parsedate_to_datetime(response_expires) - datetime.datetime.now(tz=datetime.UTC)
+            return int(lifetime.total_seconds())
+        return self.KV_LIFETIME
+
+    def url(self, url: str, params: dict = None) -> str:
+        return _redis_url_str(url, tuple(sorted((params or dict()).items())))
+
+    async def _request(self, http_session: aiohttp.ClientSession, method: str, url: str, /, caller: str,
+                       headers: dict = None, params: dict = None, data: dict = None,
+                       fail_fast_statuses: frozenset = frozenset()) -> tuple[int, typing.Any, multidict.CIMultiDictProxy | None]:
 
         result_status = http.HTTPStatus.NOT_FOUND
-        result_data = None
 
         attempts_remaining = AppConstants.ESI_ERROR_RETRY_COUNT
-        while result_data is None and attempts_remaining > 0:
-            result_loglevel = logging.INFO
+        while attempts_remaining > 0:
             try:
-                async with await http_session.get(url, headers=request_headers, params=request_params) as response:
-                    result_status = response.status
+                async with await http_session.request(method, url, headers=headers, params=params, data=data) as response:
 
-                    if response.status in [http.HTTPStatus.OK]:
-                        response_json: typing.Final = await response.json()
-                        response_etag: typing.Final = response.headers.get(self.ETAG)
-                        response_expires: typing.Final = response.headers.get(self.EXPIRES)
-                        result_data = response_json
-                        if response_etag is not None and response_json is not None:
-                            lifetime = self.KV_LIFETIME
-                            if response_expires:
-                                lifetime = dateutil.parser.parse(response_expires) - datetime.datetime.now(tz=datetime.UTC)
-                                lifetime = int(lifetime.total_seconds())
-
-                            with contextlib.suppress(redis.RedisError):
-                                response_json_str = await asyncio.to_thread(json.dumps, response_json)
-                                async with redis.asyncio.Redis.from_pool(self.redis_pool) as rc:
-                                    tasks: typing.Final = list()
-                                    tasks.append(rc.setex(name=json_key, value=response_json_str, time=lifetime))
-                                    tasks.append(rc.setex(name=etag_key, value=response_etag, time=lifetime))
-                                    await asyncio.gather(*tasks)
-                        break
-
-                    if response.status in [http.HTTPStatus.NOT_MODIFIED]:
-                        result_data = previous_json
-                        break
-
-                    if (100 * response.status // 100) == http.HTTPStatus.BAD_REQUEST:
-                        result_loglevel = logging.ERROR
+                    if response.status == http.HTTPStatus.OK:
+                        return response.status, await response.json(), response.headers
+
+                    if response.status == http.HTTPStatus.NOT_MODIFIED:
+                        return response.status, None, response.headers
 
+                    result_status = response.status
+                    result_loglevel = logging.WARNING
                     attempts_remaining -= 1
-                    otel_add_error(f"{response.url} -> {response.status}")
-                    self.logger.log(result_loglevel, f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {response.url} -> {response.status} / {await response.text()}")
-                    if response.status in [http.HTTPStatus.BAD_REQUEST, http.HTTPStatus.FORBIDDEN]:
+                    if response.status in fail_fast_statuses:
+                        result_loglevel = logging.ERROR
                         attempts_remaining = 0
+
+                    otel_add_error(lambda: f"{response.url} -> {response.status}")
+                    if self.logger.isEnabledFor(result_loglevel):
+                        self.logger.log(result_loglevel, f"- AppESI.{caller}: {response.url} -> {response.status} {response.reason} ({response.content_length} bytes)")
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug(f"- AppESI.{caller}: {response.url} -> {await response.text()}")
                     if attempts_remaining > 0:
-                        await asyncio.sleep(AppConstants.ESI_ERROR_SLEEP_TIME * AppConstants.ESI_ERROR_SLEEP_MODIFIERS.get(response.status, 1))
+                        await asyncio.sleep(self.retry_delay(attempts_remaining, response))
 
             except aiohttp.client_exceptions.ClientConnectionError as ex:
                 attempts_remaining -= 1
-                otel_add_error(f"{url} -> {ex=}")
-                self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {url=}, {ex=}")
+                otel_add_error(lambda ex=ex: f"{url} -> {ex=}")
+                self.logger.error(f"- AppESI.{caller}: {url=}, {ex=}")
                 if attempts_remaining > 0:
-                    await asyncio.sleep(AppConstants.ESI_ERROR_SLEEP_TIME)
+                    await asyncio.sleep(self.retry_delay(attempts_remaining))
 
             except Exception as ex:
-                otel_add_error(f"{url} -> {ex=}")
-                self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {url=}, {ex=}")
+                otel_add_error(lambda ex=ex: f"{url} -> {ex=}")
+                self.logger.error(f"- AppESI.{caller}: {url=}, {ex=}")
                 break
 
-        self.logger.info(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {response.url} -> {result_status}")
-        return AppESIResult(result_status, result_data)
+        return result_status, None, None
+
+    async def prefetch_cache(self, redis_urls: list[str]) -> dict[str, tuple[bytes | None, bytes | None, bytes | None]]:
+        redis_urls = [x for x in redis_urls if x not in self.local_cache]
+        if len(redis_urls) == 0:
+            return dict()
+
+        keys: typing.Final = list()
+        for redis_url in redis_urls:
+            keys.extend([f"json:{redis_url}", f"etag:{redis_url}", f"exp:{redis_url}"])
+
+        values = None
+        with contextlib.suppress(redis.RedisError):
+            values = await self.rc.mget(keys)
+        if values is None:
+            return dict()
+
+        return {redis_url: tuple(values[3 * i:3 * i + 3]) for i, redis_url in enumerate(redis_urls)}
+
+    async def get(self, http_session: aiohttp.ClientSession, url: str, /, request_headers: dict = None, request_params: dict = None,
+                  prefetched: tuple[bytes | None, bytes | None, bytes | None] | None = None) -> AppESIResult:
+
+        request_headers = request_headers or dict()
+
+        redis_url: typing.Final = self.url(url, request_params)
+        etag_key: typing.Final = f"etag:{redis_url}"
+        json_key: typing.Final = f"json:{redis_url}"
+        expires_key: typing.Final = f"exp:{redis_url}"
+
+        previous_json_bytes: bytes = None
+        previous_etag: str = None
+        previous_expires: float = 0
+        local_entry: typing.Final = self.local_cache.get(redis_url)
+        if local_entry is not None:
+            previous_etag, previous_json_bytes, previous_expires = local_entry
+        else:
+            if prefetched is None:
+                with contextlib.suppress(redis.RedisError):
+                    prefetched = await self.rc.mget(json_key, etag_key, expires_key)
+
+            if prefetched is not None:
+                pv, pe, px = prefetched
+                if pv is not None and pe is not None:
+                    previous_json_bytes = pv
+                    previous_etag = pe.decode()
+                    if px is not None:
+                        previous_expires = float(px)
+
+        # Authorized responses are only served after ESI has seen the token.
+        authorized: typing.Final = self.AUTHORIZATION in request_headers or self.AUTHORIZATION in http_session.headers
+        if previous_json_bytes is not None and time.time() < previous_expires and not authorized:
+            if local_entry is None:
+                self.local_cache[redis_url] = (previous_etag, previous_json_bytes, previous_expires)
+            return AppESIResult(http.HTTPStatus.OK, orjson.loads(previous_json_bytes))
+
+        return await self._get_from_esi(http_session, url, redis_url, request_headers, request_params, previous_etag, previous_json_bytes)
 
     @otel
-    async def post(self, http_session: aiohttp.ClientSession, url: str, body: dict, /, request_headers: dict = None, request_params: dict = None) -> AppESIResult:
+    async def _get_from_esi(self, http_session: aiohttp.ClientSession, url: str, redis_url: str, request_headers: dict, request_params: dict | None,
+                            previous_etag: str | None, previous_json_bytes: bytes | None, /) -> AppESIResult:
 
-        result_status = http.HTTPStatus.NOT_FOUND
-        result_data = None
+        etag_key: typing.Final = f"etag:{redis_url}"
+        json_key: typing.Final = f"json:{redis_url}"
+        expires_key: typing.Final = f"exp:{redis_url}"
 
-        attempts_remaining = AppConstants.ESI_ERROR_RETRY_COUNT
-        while result_data is None and attempts_remaining > 0:
-            try:
-                async with await http_session.post(url, headers=request_headers, data=body, params=request_params) as response:
-                    result_status = response.status
+        if previous_etag is not None and previous_json_bytes is not None:
+            request_headers[self.IF_NON_MATCH] = previous_etag
 
-                    if response.status in [http.HTTPStatus.OK]:
-                        result_data = await response.json()
-                        break
+        result_status, response_json, response_headers = await self._request(
+            http_session, "GET", url, caller="get", headers=request_headers, params=request_params,
+            fail_fast_statuses=_FAIL_FAST_GET)
+        result_data = None
 
-                    attempts_remaining -= 1
-                    otel_add_error(f"{response.url} -> {response.status}")
-                    self.logger.warning(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {response.url} -> {response.status} / {await response.text()}")
-                    if response.status in [http.HTTPStatus.BAD_REQUEST, http.HTTPStatus.FORBIDDEN, http.HTTPStatus.UNAUTHORIZED]:
-                        attempts_remaining = 0
-                    if attempts_remaining > 0:
-                        await asyncio.sleep(AppConstants.ESI_ERROR_SLEEP_TIME * AppConstants.ESI_ERROR_SLEEP_MODIFIERS.get(response.status, 1))
+        if result_status == http.HTTPStatus.OK:
+            response_etag: typing.Final = response_headers.get(self.ETAG)
+            response_expires: typing.Final = response_headers.get(self.EXPIRES)
+            result_data = response_json
+            if response_etag is not None and response_json is not None:
+                lifetime = self.cache_lifetime(response_expires)
+                expires_epoch = time.time() + lifetime
+                response_json_bytes = orjson.dumps(response_json)
+                self.local_cache[redis_url] = (response_etag, response_json_bytes, expires_epoch)
+
+                with contextlib.suppress(redis.RedisError):
+                    async with self.rc.pipeline(transaction=False) as pipe:
+                        pipe.setex(name=json_key, value=response_json_bytes, time=lifetime)
+                        pipe.setex(name=etag_key, value=response_etag, time=lifetime)
+                        pipe.setex(name=expires_key, value=expires_epoch, time=lifetime)
+                        await pipe.execute()
+
+        elif result_status == http.HTTPStatus.NOT_MODIFIED:
+            result_data = orjson.loads(previous_json_bytes)
+            lifetime = self.cache_lifetime(response_headers.get(self.EXPIRES))
+            expires_epoch = time.time() + lifetime
+            self.local_cache[redis_url] = (previous_etag, previous_json_bytes, expires_epoch)
+
+            with contextlib.suppress(redis.RedisError):
+                async with self.rc.pipeline(transaction=False) as pipe:
+                    pipe.setex(name=json_key, value=previous_json_bytes, time=lifetime)
+                    pipe.setex(name=etag_key, value=previous_etag, time=lifetime)
+                    pipe.setex(name=expires_key, value=expires_epoch, time=lifetime)
+                    await pipe.execute()
+
+        else:
+            self.local_cache.pop(redis_url, None)
+
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"- AppESI.get: {redis_url} -> {result_status}")
+        return AppESIResult(result_status, result_data)
 
-            except aiohttp.client_exceptions.ClientConnectionError as ex:
-                attempts_remaining -= 1
-                otel_add_error(f"{url} -> {ex=}")
-                self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {url=}, {ex=}")
-                if attempts_remaining > 0:
-                    await asyncio.sleep(AppConstants.ESI_ERROR_SLEEP_TIME)
+    @otel
+    async def post(self, http_session: aiohttp.ClientSession, url: str, body: dict, /, request_headers: dict = None, request_params: dict = None) -> AppESIResult:
 
-            except Exception as ex:
-                otel_add_error(f"{url} -> {ex=}")
-                self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {url=}, {ex=}")
-                break
+        result_status, result_data, _ = await self._request(
+            http_session, "POST", url, caller="post", headers=request_headers, params=request_params, data=body,
+            fail_fast_statuses=_FAIL_FAST_POST)
 
         return AppESIResult(result_status, result_data)
 
     async def status(self) -> bool:
-        async with aiohttp.ClientSession() as http_session:
-            request_params: typing.Final = {
-                "datasource": "tranquility",
-                "language": "en"
-            }
-            status_result = await self.get(http_session, f"{AppConstants.ESI_API_ROOT}{AppConstants.ESI_API_VERSION}/status/", request_params=request_params)
-            self.logger.info(f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {status_result=}")
-            if status_result.status in [http.HTTPStatus.OK, http.HTTPStatus.NOT_MODIFIED] and status_result.data is not None:
-                if all([int(status_result.data.get("players", 0)) > 128, bool(status_result.data.get("vip", False)) is False]):
-                    return True
+        request_params: typing.Final = {
+            "datasource": "tranquility",
+            "language": "en"
+        }
+        status_result = await self.get(self.shared_http_session(), f"{AppConstants.ESI_API_ROOT}{AppConstants.ESI_API_VERSION}/status/", request_params=request_params)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"AppESI.status: {status_result=}")
+        if status_result.status in _OK_OR_NOT_MODIFIED and status_result.data is not None:
+            if all([int(status_result.data.get("players", 0)) > 128, bool(status_result.data.get("vip", False)) is False]):
+                return True
 
         return False
 
-    async def pages(self, url: str, access_token: str, /, request_params: dict = None, connector: typing.Optional[aiohttp.TCPConnector] = None) -> AppESIResult:
+    async def pages(self, url: str, access_token: str, /, request_params: dict = None) -> AppESIResult:
 
-        session_headers: typing.Final = dict()
+        auth_headers: typing.Final = dict()
         if len(access_token) > 0:
-            session_headers["Authorization"] = f"Bearer {access_token}"
+            auth_headers[AppESI.AUTHORIZATION] = f"Bearer {access_token}"
 
-        request_headers = dict()
+        request_headers = dict(auth_headers)
 
-        redis_url: typing.Final = await self.url(url, request_params)
-        etag_key: typing.Final = f"etag:{redis_url!s}"
-        pages_key: typing.Final = f"pages:{redis_url!s}"
-        json_key: typing.Final = f"json:{redis_url!s}"
+        redis_url: typing.Final = self.url(url, request_params)
+        etag_key: typing.Final = f"etag:{redis_url}"
+        pages_key: typing.Final = f"pages:{redis_url}"
+        json_key: typing.Final = f"json:{redis_url}"
 
         previous_json: dict = None
-        with contextlib.suppress(redis.RedisError):
-            async with redis.asyncio.Redis.from_pool(self.redis_pool) as rc:
-                pv = await rc.get(json_key)
-                if pv is not None:
-                    previous_json = await asyncio.to_thread(json.loads, pv)
-
         previous_pages: int = 0
+        previous_etag: bytes = None
         with contextlib.suppress(redis.RedisError):
-            async with redis.asyncio.Redis.from_pool(self.redis_pool) as rc:
-                pv = await rc.get(pages_key)
-                if pv is not None:
-                    previous_pages = int(pv)
+            pv, pp, previous_etag = await self.rc.mget(json_key, pages_key, etag_key)
+            if pv is not None:
+                previous_json = orjson.loads(pv)
+            if pp is not None:
+                previous_pages = int(pp)
 
-        previous_etag: str = None
-        with contextlib.suppress(redis.RedisError):
-            async with redis.asyncio.Redis.from_pool(self.redis_pool) as rc:
-                previous_etag = await rc.get(etag_key)
-                if previous_etag is not None and previous_json is not None and previous_pages > 0:
-                    request_headers[AppESI.IF_NON_MATCH] = previous_etag
+        if previous_etag is not None and previous_json is not None and previous_pages > 0:
+            request_headers[AppESI.IF_NON_MATCH] = previous_etag.decode()
 
-        result_status = http.HTTPStatus.NOT_FOUND
+        http_session: typing.Final = self.shared_http_session()
+
+        page_tasks: typing.Final[list[asyncio.Task]] = list()
+
+        async def start_page_tasks(maxpageno: int) -> None:
+            page_params: typing.Final = [request_params | {"page": x} for x in range(2, 1 + int(maxpageno))]
+            prefetched: typing.Final = await self.prefetch_cache([self.url(url, x) for x in page_params])
+            for x in page_params:
+                page_tasks.append(asyncio.create_task(self.get(http_session, url, request_headers=dict(auth_headers), request_params=x, prefetched=prefetched.get(self.url(url, x)))))
+
+        result_status, response_json, response_headers = await self._request(
+            http_session, "GET", url, caller="pages", headers=request_headers, params=request_params,
+            fail_fast_statuses=_FAIL_FAST_GET)
         result_data = None
-        result_loglevel = logging.INFO
-        maxpageno: int = 0
-
-        if connector is None:
-            connector = aiohttp.TCPConnector(limit_per_host=AppConstants.ESI_LIMIT_PER_HOST)
-
-        async with aiohttp.ClientSession(headers=session_headers, connector=connector) as http_session:
-
-            attempts_remaining = AppConstants.ESI_ERROR_RETRY_COUNT
-            while result_data is None and attempts_remaining > 0:
-                try:
-                    async with await http_session.get(url, headers=request_headers, params=request_params) as response:
-                        result_status = response.status
-
-                        if response.status in [http.HTTPStatus.OK]:
-                            response_pages = int(response.headers.get(AppESI.PAGES, 1))
-                            response_json: typing.Final = await response.json()
-                            response_etag: typing.Final = response.headers.get(AppESI.ETAG)
-                            response_expires: typing.Final = response.headers.get(AppESI.EXPIRES)
-
-                            if response_etag is not None and response_json is not None:
-                                lifetime = AppESI.KV_LIFETIME
-                                if response_expires:
-                                    lifetime = dateutil.parser.parse(response_expires) - datetime.datetime.now(tz=datetime.UTC)
-                                    lifetime = int(lifetime.total_seconds())
-
-                                with contextlib.suppress(redis.RedisError):
-                                    response_json_str = await asyncio.to_thread(json.dumps, response_json)
-                                    async with redis.asyncio.Redis.from_pool(self.redis_pool) as rc:
-                                        tasks: typing.Final = list()
-                                        tasks.append(rc.setex(name=json_key, value=response_json_str, time=lifetime))
-                                        tasks.append(rc.setex(name=pages_key, value=response_pages, time=lifetime))
-                                        tasks.append(rc.setex(name=etag_key, value=response_etag, time=lifetime))
-                                        await asyncio.gather(*tasks)
-
-                            maxpageno = response_pages
-                            result_data = list()
-                            result_data.extend(response_json)
-                            break
+        result_loglevel = logging.ERROR if result_status in _FAIL_FAST_GET else logging.INFO
 
-                        elif response.status in [http.HTTPStatus.NOT_MODIFIED]:
-                            maxpageno = previous_pages
-                            result_data = list()
-                            result_data.extend(previous_json)
-                            break
+        if result_status == http.HTTPStatus.OK:
+            response_pages = int(response_headers.get(AppESI.PAGES, 1))
+            await start_page_tasks(response_pages)
+            response_etag: typing.Final = response_headers.get(AppESI.ETAG)
+            response_expires: typing.Final = response_headers.get(AppESI.EXPIRES)
 
-                        else:
-                            attempts_remaining -= 1
-                            otel_add_error(f"{response.url} -> {response.status}")
-                            self.logger.warning("- {}.{}: {}".format(self.__class__.__name__, inspect.currentframe().f_code.co_name, f"{response.url} -> {response.status} {await response.text()}"))
-                            if response.status in [http.HTTPStatus.BAD_REQUEST, http.HTTPStatus.FORBIDDEN]:
-                                result_loglevel = logging.ERROR
-                                attempts_remaining = 0
-                            if attempts_remaining > 0:
-                                await asyncio.sleep(AppConstants.ESI_ERROR_SLEEP_TIME * AppConstants.ESI_ERROR_SLEEP_MODIFIERS.get(response.status, 1))
-
-                except aiohttp.ClientConnectionError as ex:
-                    attempts_remaining -= 1
-                    otel_add_error(f"{url} -> {ex=}")
-                    self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {url=}, {ex=}")
-                    if attempts_remaining > 0:
-                        await asyncio.sleep(AppConstants.ESI_ERROR_SLEEP_TIME)
+            if response_etag is not None and response_json is not None:
+                lifetime = self.cache_lifetime(response_expires)
+
+                with contextlib.suppress(redis.RedisError):
+                    response_json_bytes = orjson.dumps(response_json)
+                    async with self.rc.pipeline(transaction=False) as pipe:
+                        pipe.setex(name=json_key, value=response_json_bytes, time=lifetime)
+                        pipe.setex(name=pages_key, value=response_pages, time=lifetime)
+                        pipe.setex(name=etag_key, value=response_etag, time=lifetime)
+                        await pipe.execute()
+
+            result_data = response_json
 
-                except Exception as ex:
-                    otel_add_error(f"{url} -> {ex=}")
-                    self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {url=}, {ex=}")
-                    break
+        elif result_status == http.HTTPStatus.NOT_MODIFIED:
+            await start_page_tasks(previous_pages)
+            result_data = previous_json
+
+        if len(page_tasks) > 0:
+            try:
+                if result_data is not None:
+                    for page_future in asyncio.as_completed(page_tasks):
+                        result: AppESIResult = await page_future
+                        if result.status not in _OK_OR_NOT_MODIFIED:
+                            result_status = result.status
+                            result_data = None
+                            break
+            finally:
+                for task in page_tasks:
+                    task.cancel()
 
             if result_data is not None:
-                pages = list(range(2, 1 + int(maxpageno)))
-                task_list: typing.Final = [self.get(http_session, url, request_params=request_params | {"page": x}) for x in pages]
-                if len(task_list) > 0:
-                    for result in await asyncio.gather(*task_list):
-                        if isinstance(result, AppESIResult):
-                            if result.status in [http.HTTPStatus.OK, http.HTTPStatus.NOT_MODIFIED]:
-                                result_data.extend(result.data)
-                            else:
-                                result_status = result.status
-                                result_data = None
-                                break
-
-        self.logger.log(result_loglevel, f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {redis_url} -> {result_status}")
+                pages_data: typing.Final[list[list]] = [result_data]
+                pages_data.extend(task.result().data for task in page_tasks)
+                result_data = list(itertools.chain.from_iterable(pages_data))
+
+        if self.logger.isEnabledFor(result_loglevel):
+            self.logger.log(result_loglevel, f"- AppESI.pages: {redis_url} -> {result_status}")
         return AppESIResult(result_status, result_data)
@@ -1,3 +1,4 @@
+import asyncio
 import collections
 import contextlib
 import dataclasses
@@ -5,9 +6,11 @@ import datetime
 import functools
 import hashlib
 import inspect
+import time
 import typing
 import urllib.parse
 
+import cachetools
 import icalendar
 import opentelemetry.trace
 import quart
@@ -24,11 +27,13 @@ from support.telemetry import otel, otel_add_event
 from .constants import AppConstants, AppSessionKeys
 from .db import AppAccessType, AppDatabase, AppTables
 
+_OTEL_ATTRIBUTE_TYPES: typing.Final = (bool, str, bytes, int, float)
 
-@dataclasses.dataclass(frozen=True)
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class AppRequest:
-    ts: datetime.datetime = dataclasses.field(default_factory=functools.partial(datetime.datetime.now, tz=datetime.UTC))
-    session: quart.sessions.SessionMixin = quart.session
+    ts: datetime.datetime
+    session: quart.sessions.SessionMixin
     character_id: int = 0
     corpporation_id: int = 0
     alliance_id: int = 0
@@ -50,13 +55,45 @@ class AppMoonMiningHistory:
 
 class AppFunctions:
 
+    ACL_CACHE_LIFETIME: typing.Final = 60
+    ACL_CACHE: typing.ClassVar[tuple[float, dict[tuple[AppAccessType, int], AppTables.AccessControls]] | None] = None
+    ACL_CACHE_LOCK: typing.Final = asyncio.Lock()
+
+    ACCESS_HISTORY_QUEUE: typing.Final[asyncio.Queue] = asyncio.Queue(maxsize=10000)
+
+    STREAM_EXECUTION_OPTIONS: typing.Final = {"yield_per": 1000}
+
+    NOW_BUCKET_MINUTES: typing.Final = 5
+
+    STRUCTURE_COUNTS_CACHE_SIZE: typing.Final = 8
+    STRUCTURE_COUNTS_CACHE_LIFETIME: typing.Final = 30
+    STRUCTURE_COUNTS_CACHE: typing.Final = cachetools.TTLCache(maxsize=STRUCTURE_COUNTS_CACHE_SIZE, ttl=STRUCTURE_COUNTS_CACHE_LIFETIME)
+
+    APP_REQUEST_CACHE_SIZE: typing.Final = 4096
+    APP_REQUEST_CACHE_LIFETIME: typing.Final = 5
+    APP_REQUEST_CACHE: typing.Final = cachetools.TTLCache(maxsize=APP_REQUEST_CACHE_SIZE, ttl=APP_REQUEST_CACHE_LIFETIME)
+    APP_REQUEST_PENDING: typing.Final[dict[tuple, asyncio.Event]] = dict()
+
+    @staticmethod
+    def bucket(now: datetime.datetime, minutes: int = NOW_BUCKET_MINUTES) -> datetime.datetime:
+        return now.replace(minute=now.minute - now.minute % minutes, second=0, microsecond=0)
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def session_scope(evedb: AppDatabase, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> typing.AsyncIterator[sqlalchemy.ext.asyncio.AsyncSession]:
+        if session is not None:
+            yield session
+        else:
+            async with await evedb.sessionmaker() as session:
+                yield session
+
     @staticmethod
     @otel
-    async def get_esi_corporation_alliance_ids(evedb: AppDatabase, character_id: int, /) -> tuple[int, int]:
+    async def get_esi_corporation_alliance_ids(evedb: AppDatabase, character_id: int, /, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> tuple[int, int]:
         corporation_id, alliance_id = 0, 0
         if character_id > 0:
             with contextlib.suppress(Exception):
-                async with await evedb.sessionmaker() as session, session.begin():
+                async with AppFunctions.session_scope(evedb, session) as session:
                     session: sqlalchemy.ext.asyncio.AsyncSession
                     query = (
                         sqlalchemy.select(AppTables.Character)
@@ -70,21 +107,30 @@ class AppFunctions:
                         alliance_id = result.alliance_id
         return corporation_id, alliance_id
 
+    @staticmethod
+    def record_access(character_id: int, permitted: bool, path: str) -> None:
+        with contextlib.suppress(asyncio.QueueFull):
+            AppFunctions.ACCESS_HISTORY_QUEUE.put_nowait(AppTables.AccessHistory(character_id=character_id, permitted=permitted, path=path))
+
     @staticmethod
     @otel
     async def get_app_request(evedb: AppDatabase, session: quart.sessions.SessionMixin, request: quart.Request) -> AppRequest:
 
         character_id: typing.Final = session.get(AppSessionKeys.KEY_ESI_CHARACTER_ID, 0)
-        corpporation_id, alliance_id = await AppFunctions.get_esi_corporation_alliance_ids(evedb, character_id)
+        (corpporation_id, alliance_id), acl_by_key = await asyncio.gather(
+            AppFunctions.get_esi_corporation_alliance_ids(evedb, character_id),
+            AppFunctions.get_access_controls(evedb),
+        )
 
-        permitted: typing.Final = await AppFunctions.is_permitted(evedb, character_id, corpporation_id, alliance_id)
-        contributor: typing.Final = any([session.get(AppSessionKeys.KEY_APP_SESSION_TYPE, "USER") == "CONTRIBUTOR", character_id in AppConstants.MAGIC_ADMINS | AppConstants.MAGIC_CONTRIBUTORS])
+        permitted, _ = AppFunctions.evaluate_acls(acl_by_key, character_id, corpporation_id, alliance_id)
         suspect: typing.Final = character_id in AppConstants.MAGIC_SUSPECTS
-        magic_character: typing.Final = character_id in AppConstants.MAGIC_ADMINS | AppConstants.MAGIC_CONTRIBUTORS
+        magic_character: typing.Final = character_id in AppConstants.MAGIC_ADMINS_OR_CONTRIBUTORS
+        contributor: typing.Final = session.get(AppSessionKeys.KEY_APP_SESSION_TYPE, "USER") == "CONTRIBUTOR" or magic_character
 
         session[AppSessionKeys.KEY_APP_REQUEST_PATH] = quart.request.path
 
-        ar = AppRequest(session=session,
+        ar = AppRequest(ts=datetime.datetime.now(tz=datetime.UTC),
+                        session=session,
                         character_id=character_id,
                         corpporation_id=corpporation_id,
                         alliance_id=alliance_id,
@@ -94,45 +140,59 @@ class AppFunctions:
                         magic_character=magic_character)
 
         if ar.character_id > 0:
-            with contextlib.suppress(Exception):
-                async with await evedb.sessionmaker() as db_session, db_session.begin():
-                    db_session: sqlalchemy.ext.asyncio.AsyncSession
-                    db_session.add(AppTables.AccessHistory(character_id=ar.character_id, permitted=bool(ar.permitted), path=request.path))
-                    await db_session.commit()
+            AppFunctions.record_access(ar.character_id, bool(ar.permitted), request.path)
 
-        if any([character_id > 0, corpporation_id > 0, alliance_id > 0]):
-            otel_add_event(str(inspect.currentframe().f_code.co_name), {k: v for k, v in ar.__dict__.items() if type(v).__name__ in ['bool', 'str', 'bytes', 'int', 'float']})
+        if character_id > 0 or corpporation_id > 0 or alliance_id > 0:
+            otel_add_event("get_app_request", {f.name: v for f in dataclasses.fields(ar) if isinstance(v := getattr(ar, f.name), _OTEL_ATTRIBUTE_TYPES)})
 
         return ar
 
     @staticmethod
-    @otel
-    async def get_active_timers(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> list[AppTables.Structure]:
-
-        timer_states: typing.Final = ["armor_reinforce", "armor_vulnerable", "hull_reinforce", "hull_vulnerable", "shield_vulnerable"]
+    def app_request_cache_key(session: quart.sessions.SessionMixin) -> tuple | None:
+        sid: typing.Final = getattr(session, "sid", None)
+        character_id: typing.Final = session.get(AppSessionKeys.KEY_ESI_CHARACTER_ID, 0)
+        if sid is None or not character_id > 0:
+            return None
+        return sid, character_id, session.get(AppSessionKeys.KEY_APP_SESSION_TYPE, "USER")
 
-        timer_window: typing.Final = datetime.timedelta(minutes=15)
-        query = (
-            sqlalchemy.select(AppTables.Structure)
-            .where(
-                sqlalchemy.and_(
-                    AppTables.Structure.state_timer_end > now - timer_window,
-                    AppTables.Structure.state.in_(timer_states)
-                )
-            )
-            .join(AppTables.Structure.system)
-            .join(AppTables.Structure.corporation)
-            .order_by(AppTables.Structure.state_timer_end)
-            .options(sqlalchemy.orm.selectinload(AppTables.Structure.system))
-            .options(sqlalchemy.orm.selectinload(AppTables.Structure.corporation))
-        )
+    @staticmethod
+    def invalidate_app_request(session: quart.sessions.SessionMixin) -> None:
+        cache_key: typing.Final = AppFunctions.app_request_cache_key(session)
+        if cache_key is not None:
+            AppFunctions.APP_REQUEST_CACHE.pop(cache_key, None)
 
-        return [x async for x in await session.stream_scalars(query)]
+    @staticmethod
+    async def get_cached_app_request(evedb: AppDatabase, session: quart.sessions.SessionMixin, request: quart.Request) -> AppRequest:
+        cache_key: typing.Final = AppFunctions.app_request_cache_key(session)
+        if cache_key is None:
+            return await AppFunctions.get_app_request(evedb, session, request)
+
+        ar = AppFunctions.APP_REQUEST_CACHE.get(cache_key)
+        if ar is None and (pending := AppFunctions.APP_REQUEST_PENDING.get(cache_key)) is not None:
+            await pending.wait()
+            ar = AppFunctions.APP_REQUEST_CACHE.get(cache_key)
+
+        if ar is None:
+            pending = AppFunctions.APP_REQUEST_PENDING[cache_key] = asyncio.Event()
+            try:
+                ar = await AppFunctions.get_app_request(evedb, session, request)
+                AppFunctions.APP_REQUEST_CACHE[cache_key] = ar
+            finally:
+                AppFunctions.APP_REQUEST_PENDING.pop(cache_key, None)
+                pending.set()
+            return ar
+
+        session[AppSessionKeys.KEY_APP_REQUEST_PATH] = request.path
+        AppFunctions.record_access(ar.character_id, bool(ar.permitted), request.path)
+
+        return dataclasses.replace(ar, ts=datetime.datetime.now(tz=datetime.UTC), session=session)
 
     @staticmethod
     @otel
     async def get_completed_extractions(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> list[AppTables.CompletedExtraction]:
 
+        now = AppFunctions.bucket(now)
+
         query = (
             sqlalchemy.select(AppTables.CompletedExtraction)
             .where(
@@ -147,12 +207,15 @@ class AppFunctions:
             .options(sqlalchemy.orm.selectinload(AppTables.CompletedExtraction.moon))
         )
 
-        return [x async for x in await session.stream_scalars(query)]
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        return list(query_result.scalars().all())
 
     @staticmethod
     @otel
     async def get_scheduled_extractions(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> list[AppTables.ScheduledExtraction]:
 
+        now = AppFunctions.bucket(now)
+
         query = (
             sqlalchemy.select(AppTables.ScheduledExtraction)
             .where(
@@ -167,31 +230,30 @@ class AppFunctions:
             .options(sqlalchemy.orm.selectinload(AppTables.ScheduledExtraction.moon))
         )
 
-        return [x async for x in await session.stream_scalars(query)]
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        return list(query_result.scalars().all())
 
     @staticmethod
     @otel
     async def get_unscheduled_structures(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> list[AppTables.CompletedExtraction]:
 
+        now = AppFunctions.bucket(now)
+
         query = (
             sqlalchemy.select(AppTables.CompletedExtraction)
+            .join(AppTables.Structure, AppTables.Structure.structure_id == AppTables.CompletedExtraction.structure_id)
+            .outerjoin(
+                AppTables.ScheduledExtraction,
+                sqlalchemy.and_(
+                    AppTables.ScheduledExtraction.structure_id == AppTables.Structure.structure_id,
+                    AppTables.ScheduledExtraction.natural_decay_time > now,
+                    AppTables.ScheduledExtraction.extraction_start_time <= now,
+                )
+            )
             .where(
-                AppTables.CompletedExtraction.structure_id.in_(
-                    sqlalchemy.select(AppTables.Structure.structure_id)
-                    .where(
-                        sqlalchemy.and_(
-                            AppTables.Structure.has_moon_drill == sqlalchemy.sql.expression.true(),
-                            AppTables.Structure.structure_id.notin_(
-                                sqlalchemy.select(AppTables.ScheduledExtraction.structure_id)
-                                .where(
-                                    sqlalchemy.and_(
-                                        AppTables.ScheduledExtraction.natural_decay_time > now,
-                                        AppTables.ScheduledExtraction.extraction_start_time <= now,
-                                    )
-                                )
-                            )
-                        )
-                    )
+                sqlalchemy.and_(
+                    AppTables.Structure.has_moon_drill == sqlalchemy.sql.expression.true(),
+                    AppTables.ScheduledExtraction.structure_id == sqlalchemy.sql.expression.null(),
                 )
             )
             .order_by(AppTables.CompletedExtraction.natural_decay_time)
@@ -200,75 +262,102 @@ class AppFunctions:
             .options(sqlalchemy.orm.selectinload(AppTables.CompletedExtraction.moon))
         )
 
-        return [x async for x in await session.stream_scalars(query)]
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        return list(query_result.scalars().all())
 
     @staticmethod
     @otel
-    async def get_structure_fuel_expiries(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> list[AppTables.Structure]:
+    async def get_structure_dashboard(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> tuple[list[AppTables.Structure], list[AppTables.Structure], list[AppTables.Structure]]:
 
-        query = (
-            sqlalchemy.select(AppTables.Structure)
-            .where(
-                sqlalchemy.and_(
-                    AppTables.Structure.fuel_expires != sqlalchemy.sql.expression.null(),
-                    AppTables.Structure.fuel_expires > now,
-                )
-            )
-            .join(AppTables.Structure.system)
-            .join(AppTables.Structure.corporation)
-            .order_by(AppTables.Structure.fuel_expires)
-            .options(sqlalchemy.orm.selectinload(AppTables.Structure.system))
-            .options(sqlalchemy.orm.selectinload(AppTables.Structure.corporation))
-        )
+        now = AppFunctions.bucket(now)
 
-        return [x async for x in await session.stream_scalars(query)]
+        timer_states: typing.Final = ["armor_reinforce", "armor_vulnerable", "hull_reinforce", "hull_vulnerable", "shield_vulnerable"]
+        timer_window: typing.Final = datetime.timedelta(minutes=15)
 
-    @staticmethod
-    @otel
-    async def get_structures_without_fuel(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> list[AppTables.Structure]:
+        is_active_timer: typing.Final = sqlalchemy.and_(
+            AppTables.Structure.state_timer_end > now - timer_window,
+            AppTables.Structure.state.in_(timer_states)
+        )
+        is_fueled: typing.Final = sqlalchemy.and_(
+            AppTables.Structure.fuel_expires != sqlalchemy.sql.expression.null(),
+            AppTables.Structure.fuel_expires > now,
+        )
+        is_without_fuel: typing.Final = sqlalchemy.and_(
+            AppTables.Structure.fuel_expires == sqlalchemy.sql.expression.null(),
+            AppTables.Structure.unanchors_at == sqlalchemy.sql.expression.null(),
+            AppTables.Structure.state.not_in(["anchoring", "unanchored", "unknown"])
+        )
 
         query = (
-            sqlalchemy.select(AppTables.Structure)
-            .where(
-                sqlalchemy.and_(
-                    AppTables.Structure.fuel_expires == sqlalchemy.sql.expression.null(),
-                    AppTables.Structure.unanchors_at == sqlalchemy.sql.expression.null(),
-                    AppTables.Structure.state.not_in(["anchoring", "unanchored", "unknown"])
-                )
+            sqlalchemy.select(
+                AppTables.Structure,
+                is_active_timer.label("is_active_timer"),
+                is_fueled.label("is_fueled"),
+                is_without_fuel.label("is_without_fuel"),
             )
+            .where(sqlalchemy.or_(is_active_timer, is_fueled, is_without_fuel))
             .join(AppTables.Structure.system)
             .join(AppTables.Structure.corporation)
-            .order_by(AppTables.Structure.corporation_id, sqlalchemy.desc(AppTables.Structure.timestamp))
             .options(sqlalchemy.orm.selectinload(AppTables.Structure.system))
             .options(sqlalchemy.orm.selectinload(AppTables.Structure.corporation))
         )
 
-        return [x async for x in await session.stream_scalars(query)]
+        active_timers: typing.Final[list[AppTables.Structure]] = list()
+        fuel_expiries: typing.Final[list[AppTables.Structure]] = list()
+        without_fuel: typing.Final[list[AppTables.Structure]] = list()
+
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        for obj, active_timer, fueled, unfueled in query_result.tuples():
+            if active_timer:
+                active_timers.append(obj)
+            if fueled:
+                fuel_expiries.append(obj)
+            if unfueled:
+                without_fuel.append(obj)
+
+        active_timers.sort(key=lambda x: x.state_timer_end)
+        fuel_expiries.sort(key=lambda x: x.fuel_expires)
+        without_fuel.sort(key=lambda x: x.timestamp, reverse=True)
+        without_fuel.sort(key=lambda x: x.corporation_id)
+
+        return active_timers, fuel_expiries, without_fuel
 
     @staticmethod
     @otel
     async def get_structure_counts(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> dict[int, int]:
+        now = AppFunctions.bucket(now)
+
+        results = AppFunctions.STRUCTURE_COUNTS_CACHE.get(now)
+        if results is not None:
+            return results
+
         query = (
-            sqlalchemy.select(AppTables.Structure)
+            sqlalchemy.select(AppTables.Structure.corporation_id, sqlalchemy.func.count().label("count"))
             .where(
                 sqlalchemy.and_(
                     AppTables.Structure.fuel_expires != sqlalchemy.sql.expression.null(),
                     AppTables.Structure.fuel_expires > now,
                 )
             )
+            .group_by(AppTables.Structure.corporation_id)
         )
 
-        results: dict[int, int] = collections.defaultdict(int)
-        async for x in await session.stream_scalars(query):
-            x: AppTables.Structure
-            results[x.corporation_id] += 1
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        results = collections.defaultdict(int, query_result.tuples().all())
+        AppFunctions.STRUCTURE_COUNTS_CACHE[now] = results
 
         return results
 
+    @staticmethod
+    def invalidate_structure_counts() -> None:
+        AppFunctions.STRUCTURE_COUNTS_CACHE.clear()
+
     @staticmethod
     @otel
     async def get_refresh_times(session: sqlalchemy.ext.asyncio.AsyncSession, now: datetime.datetime) -> list[AppTables.PeriodicTaskTimestamp]:
 
+        now = AppFunctions.bucket(now)
+
         start_time = now - datetime.timedelta(days=6)
         query = (
             sqlalchemy.select(AppTables.PeriodicTaskTimestamp)
@@ -284,26 +373,64 @@ class AppFunctions:
             .order_by(sqlalchemy.desc(AppTables.PeriodicTaskTimestamp.timestamp))
         )
 
-        return [x async for x in await session.stream_scalars(query)]
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        return list(query_result.scalars().all())
+
+    @staticmethod
+    @otel
+    async def fetch_with_session(evedb: AppDatabase, getter: typing.Callable[..., typing.Awaitable], *args) -> typing.Any:
+        async with await evedb.sessionmaker() as session:
+            return await getter(session, *args)
+
+    @staticmethod
+    async def dashboard_bundle(evedb: AppDatabase, now: datetime.datetime) -> tuple:
+        fetch: typing.Final = functools.partial(AppFunctions.fetch_with_session, evedb)
+        return await asyncio.gather(
+            fetch(AppFunctions.get_structure_dashboard, now),
+            fetch(AppFunctions.get_completed_extractions, now),
+            fetch(AppFunctions.get_scheduled_extractions, now),
+            fetch(AppFunctions.get_unscheduled_structures, now),
+            fetch(AppFunctions.get_structure_counts, now),
+            fetch(AppFunctions.get_refresh_times, now),
+        )
+
+    @staticmethod
+    async def moon_bundle(evedb: AppDatabase, moon_id: int, now: datetime.datetime) -> tuple:
+        fetch: typing.Final = functools.partial(AppFunctions.fetch_with_session, evedb)
+        return await asyncio.gather(
+            fetch(AppFunctions.get_moon_structure, moon_id, now),
+            fetch(AppFunctions.get_moon_yield, moon_id, now),
+            fetch(AppFunctions.get_moon_extraction_history, moon_id, now),
+            fetch(AppFunctions.get_moon_mining_history, moon_id, now),
+        )
+
+    @staticmethod
+    async def usage_bundle(evedb: AppDatabase, now: datetime.datetime) -> tuple:
+        fetch: typing.Final = functools.partial(AppFunctions.fetch_with_session, evedb)
+        return await asyncio.gather(
+            fetch(AppFunctions.get_usage, True, now),
+            fetch(AppFunctions.get_usage, False, now),
+        )
 
     @staticmethod
     @otel
-    async def get_moon_yield(session: sqlalchemy.ext.asyncio.AsyncSession, moon_id: int, now: datetime.datetime) -> list[AppTables.MoonYield]:
+    async def get_moon_yield(session: sqlalchemy.ext.asyncio.AsyncSession, moon_id: int, now: datetime.datetime) -> list[sqlalchemy.Row]:
 
         query = (
-            sqlalchemy.select(AppTables.MoonYield)
+            sqlalchemy.select(AppTables.MoonYield.type_id, AppTables.MoonYield.yield_percent)
             .where(AppTables.MoonYield.moon_id == moon_id)
             .order_by(sqlalchemy.desc(AppTables.MoonYield.yield_percent))
         )
 
-        return [x async for x in await session.stream_scalars(query)]
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        return list(query_result.all())
 
     @staticmethod
     @otel
-    async def get_moon_extraction_history(session: sqlalchemy.ext.asyncio.AsyncSession, moon_id: int, now: datetime.datetime) -> list[AppTables.ExtractionHistory]:
+    async def get_moon_extraction_history(session: sqlalchemy.ext.asyncio.AsyncSession, moon_id: int, now: datetime.datetime) -> list[dict]:
 
         query: typing.Final = (
-            sqlalchemy.select(AppTables.ExtractionHistory)
+            sqlalchemy.select(AppTables.ExtractionHistory.chunk_arrival_time)
             .where(
                 sqlalchemy.and_(
                     AppTables.ExtractionHistory.exists == sqlalchemy.sql.expression.true(),
@@ -316,8 +443,8 @@ class AppFunctions:
         )
 
         results = list()
-        async for x in await session.stream_scalars(query):
-            x: AppTables.ExtractionHistory
+        async for x in await session.stream(query, execution_options=AppFunctions.STREAM_EXECUTION_OPTIONS):
+            x: sqlalchemy.Row
             cat: datetime.datetime = x.chunk_arrival_time
             results.append({
                 'extraction': x,
@@ -330,51 +457,40 @@ class AppFunctions:
     @otel
     async def get_moon_structure(session: sqlalchemy.ext.asyncio.AsyncSession, moon_id: int, now: datetime.datetime) -> AppTables.StructureHistory:
 
-        structure_id = None
-        if structure_id is None:
-            query = (
-                sqlalchemy.select(
-                    AppTables.ScheduledExtraction.structure_id
-                )
-                .where(
-                    sqlalchemy.and_(
-                        AppTables.ScheduledExtraction.moon_id == moon_id,
-                        AppTables.ScheduledExtraction.chunk_arrival_time > now,
-                    )
+        scheduled_structure_id = (
+            sqlalchemy.select(
+                AppTables.ScheduledExtraction.structure_id
+            )
+            .where(
+                sqlalchemy.and_(
+                    AppTables.ScheduledExtraction.moon_id == moon_id,
+                    AppTables.ScheduledExtraction.chunk_arrival_time > now,
                 )
             )
+            .limit(1)
+        ).scalar_subquery()
 
-            query_result: sqlalchemy.engine.Result = await session.execute(query)
-            structure_id = query_result.scalar_one_or_none()
-
-        if structure_id is None:
-            query = (
-                sqlalchemy.select(
-                    AppTables.ExtractionHistory.structure_id
-                )
-                .where(
-                    sqlalchemy.and_(
-                        AppTables.ExtractionHistory.exists == sqlalchemy.sql.expression.true(),
-                        AppTables.ExtractionHistory.moon_id == moon_id,
-                        AppTables.ExtractionHistory.chunk_arrival_time <= now,
-                    )
+        historical_structure_id = (
+            sqlalchemy.select(
+                AppTables.ExtractionHistory.structure_id
+            )
+            .where(
+                sqlalchemy.and_(
+                    AppTables.ExtractionHistory.exists == sqlalchemy.sql.expression.true(),
+                    AppTables.ExtractionHistory.moon_id == moon_id,
+                    AppTables.ExtractionHistory.chunk_arrival_time <= now,
                 )
-                .order_by(sqlalchemy.desc(AppTables.ExtractionHistory.chunk_arrival_time))
-                .limit(1)
             )
-
-            query_result: sqlalchemy.engine.Result = await session.execute(query)
-            structure_id = query_result.scalar_one_or_none()
-
-        if structure_id is None:
-            return None
+            .order_by(sqlalchemy.desc(AppTables.ExtractionHistory.chunk_arrival_time))
+            .limit(1)
+        ).scalar_subquery()
 
         query = (
             sqlalchemy.select(AppTables.StructureHistory)
             .where(
                 sqlalchemy.and_(
                     AppTables.StructureHistory.exists == sqlalchemy.sql.expression.true(),
-                    AppTables.StructureHistory.structure_id == structure_id,
+                    AppTables.StructureHistory.structure_id == sqlalchemy.func.coalesce(scheduled_structure_id, historical_structure_id),
                 )
             )
             .order_by(sqlalchemy.desc(AppTables.StructureHistory.id))
@@ -418,7 +534,7 @@ class AppFunctions:
         tracer: opentelemetry.trace.Tracer = opentelemetry.trace.get_tracer_provider().get_tracer(tracer_name)
         # with contextlib.nullcontext():
         with tracer.start_as_current_span(f"{tracer_name}.results"):
-            async for type_id, average in await session.stream(outer_query):
+            async for type_id, average in await session.stream(outer_query, execution_options=AppFunctions.STREAM_EXECUTION_OPTIONS):
                 type_id_prices[type_id] = float(average)
 
         return type_id_prices
@@ -427,10 +543,9 @@ class AppFunctions:
     @otel
     async def get_moon_mining_history(session: sqlalchemy.ext.asyncio.AsyncSession, moon_id: int, now: datetime.datetime) -> tuple[datetime.datetime, list[AppTables.ExtractionHistory], dict[int, float]]:
 
-        query = (
+        latest_extraction = (
             sqlalchemy.select(
                 AppTables.ExtractionHistory.structure_id,
-                AppTables.ExtractionHistory.corporation_id,
                 AppTables.ExtractionHistory.chunk_arrival_time
             )
             .where(
@@ -442,11 +557,34 @@ class AppFunctions:
             )
             .order_by(sqlalchemy.desc(AppTables.ExtractionHistory.chunk_arrival_time))
             .limit(1)
+        ).cte("latest_extraction")
+
+        latest_observer_history = (
+            sqlalchemy.select(sqlalchemy.sql.functions.max(AppTables.ObserverHistory.id).label("observer_history_id"))
+            .join(
+                latest_extraction,
+                sqlalchemy.and_(
+                    AppTables.ObserverHistory.observer_id == latest_extraction.c.structure_id,
+                    AppTables.ObserverHistory.last_updated >= sqlalchemy.cast(latest_extraction.c.chunk_arrival_time, sqlalchemy.Date)
+                )
+            )
+        ).cte("latest_observer_history")
+
+        query = (
+            sqlalchemy.select(
+                latest_extraction.c.structure_id,
+                latest_extraction.c.chunk_arrival_time,
+                AppTables.ObserverHistory.id,
+                AppTables.ObserverHistory.timestamp,
+            )
+            .select_from(latest_extraction)
+            .outerjoin(latest_observer_history, sqlalchemy.sql.expression.true())
+            .outerjoin(AppTables.ObserverHistory, AppTables.ObserverHistory.id == latest_observer_history.c.observer_history_id)
         )
 
         query_result: sqlalchemy.engine.Result = await session.execute(query)
         try:
-            observer_id, corporation_id, chunk_arrival_time = query_result.one_or_none()
+            observer_id, chunk_arrival_time, observer_history_id, observer_history_timestamp = query_result.one_or_none()
         except TypeError:
             return None, list(), dict()
 
@@ -454,49 +592,32 @@ class AppFunctions:
         if isinstance(chunk_arrival_time, datetime.datetime):
             previous_chunk_arrival_date = chunk_arrival_time.date()
 
-        if observer_id is None or previous_chunk_arrival_date is None:
-            return None, list(), dict()
-
-        observer_history_id_query = (
-            sqlalchemy.select(sqlalchemy.sql.functions.max(AppTables.ObserverHistory.id))
-            .where(
-                sqlalchemy.and_(
-                    AppTables.ObserverHistory.observer_id == observer_id,
-                    AppTables.ObserverHistory.last_updated >= previous_chunk_arrival_date
-                )
-            )
-        )
-
-        query_result: sqlalchemy.engine.Result = await session.execute(observer_history_id_query)
-        observer_history_id = query_result.scalar_one_or_none()
-
         if observer_id is None or previous_chunk_arrival_date is None or observer_history_id is None:
             return None, list(), dict()
 
-        # print(f"{observer_id=}, {previous_chunk_arrival_date=}, {observer_history_id=}")
-        q = (
-            sqlalchemy.select(AppTables.ObserverHistory.timestamp)
-            .where(
-                sqlalchemy.and_(
-                    AppTables.ObserverHistory.observer_id == observer_id,
-                    AppTables.ObserverHistory.id == observer_history_id
-                )
-            )
-        )
-        query_result: sqlalchemy.engine.Result = await session.execute(q)
-        observer_history_timestamp = query_result.scalar_one_or_none()
-        # print(f"{observer_id=}, {observer_history_id=}, {observer_history_timestamp=}")
-
         moon_pricing_end_date: typing.Final = now.date()
         moon_pricing_start_date: typing.Final = moon_pricing_end_date - datetime.timedelta(weeks=12)
         type_id_prices: typing.Final = await AppFunctions.get_market_prices(session, moon_pricing_start_date, moon_pricing_end_date)
 
+        type_id_isk_prices: typing.Final = dict(type_id_prices)
+        for type_id, compressed_type_id in AppConstants.COMPRESSED_TYPE_DICT.items():
+            if compressed_type_id in type_id_prices.keys():
+                type_id_isk_prices[type_id] = type_id_prices[compressed_type_id]
+
+        price = sqlalchemy.literal(0.0)
+        if len(type_id_isk_prices) > 0:
+            price = sqlalchemy.case({k: float(v) for k, v in type_id_isk_prices.items()}, value=AppTables.ObserverRecordHistory.type_id, else_=0.0)
+
+        quantity = sqlalchemy.sql.functions.sum(AppTables.ObserverRecordHistory.quantity)
+        isk = quantity * price
+        character_isk = sqlalchemy.sql.functions.sum(isk).over(partition_by=AppTables.ObserverRecordHistory.character_id)
+
         q = (
             sqlalchemy.select(
-                AppTables.ObserverRecordHistory.observer_id,
                 AppTables.ObserverRecordHistory.character_id,
                 AppTables.ObserverRecordHistory.type_id,
-                sqlalchemy.sql.functions.sum(AppTables.ObserverRecordHistory.quantity).label("quantity"),
+                quantity.label("quantity"),
+                character_isk.label("character_isk"),
             )
             .where(
                 sqlalchemy.and_(
@@ -505,21 +626,17 @@ class AppFunctions:
                     AppTables.ObserverRecordHistory.last_updated >= previous_chunk_arrival_date,
                 )
             )
-            .group_by(AppTables.ObserverRecordHistory.observer_id, AppTables.ObserverRecordHistory.character_id, AppTables.ObserverRecordHistory.type_id)
+            .group_by(AppTables.ObserverRecordHistory.character_id, AppTables.ObserverRecordHistory.type_id)
+            .order_by(sqlalchemy.desc("character_isk"), AppTables.ObserverRecordHistory.character_id)
         )
 
-        character_results = collections.defaultdict(functools.partial(collections.defaultdict, int))
-        character_total_isk = collections.defaultdict(int)
-        async for observer_id, character_id, type_id, quantity in await session.stream(q):
-            character_results[character_id][type_id] = quantity
-            compressed_type_id = AppConstants.COMPRESSED_TYPE_DICT.get(type_id)
-            lookup_type_id = type_id
-            if compressed_type_id in type_id_prices.keys():
-                lookup_type_id = compressed_type_id
-            isk = float(quantity) * float(type_id_prices.get(lookup_type_id, 0.0))
-            character_total_isk[character_id] += isk
+        character_results: typing.Final = dict()
+        character_total_isk: typing.Final = dict()
+        async for character_id, type_id, quantity, isk in await session.stream(q, execution_options=AppFunctions.STREAM_EXECUTION_OPTIONS):
+            character_results.setdefault(character_id, dict())[type_id] = quantity
+            character_total_isk[character_id] = float(isk)
 
-        return observer_history_timestamp, [(x, dict(character_results[x])) for x in sorted(character_total_isk, key=character_total_isk.get, reverse=True)], dict(character_total_isk)
+        return observer_history_timestamp, list(character_results.items()), character_total_isk
 
     @staticmethod
     @otel
@@ -569,7 +686,7 @@ class AppFunctions:
                 .group_by(inner_alias.observer_id)
             )
 
-            async for observer_id, _, _, timestamp in await session.stream(inner_query):
+            async for observer_id, _, _, timestamp in await session.stream(inner_query, execution_options=AppFunctions.STREAM_EXECUTION_OPTIONS):
                 observer_timestamp_dict[observer_id] = timestamp
 
             inner_query = inner_query.alias()
@@ -594,7 +711,7 @@ class AppFunctions:
                 .order_by(max_alias.character_id, max_alias.observer_id, max_alias.type_id)
             )
 
-            results = [x async for x in await session.stream(max_query)]
+            results = [x async for x in await session.stream(max_query, execution_options=AppFunctions.STREAM_EXECUTION_OPTIONS)]
             for row in results:
                 structure_id, character_id, type_id, quantity, timestamp = row
                 if type_id not in type_id_prices.keys():
@@ -638,7 +755,7 @@ class AppFunctions:
                 .join(inner_query, (structure_alias.structure_id == inner_query.c.structure_id) & (structure_alias.id == inner_query.c.max_id))
             )
 
-            results = [x async for x in await session.stream(strcture_query)]
+            results = [x async for x in await session.stream(strcture_query, execution_options=AppFunctions.STREAM_EXECUTION_OPTIONS)]
             for row in results:
                 observer_id, name = row
                 observer_name_dict[observer_id] = name
@@ -677,91 +794,57 @@ class AppFunctions:
         )
 
         colnames: typing.Final = ["id", "corporation_id", "count", "last"]
-        return [dict(zip(colnames, x)) async for x in await session.stream(query)]
+        query_result: sqlalchemy.engine.Result = await session.execute(query)
+        return [dict(zip(colnames, x)) for x in query_result.all()]
 
     @staticmethod
-    @otel
-    async def get_character_name(evedb: AppDatabase, character_id: int) -> str:
-        async with await evedb.sessionmaker() as session:
+    async def get_name(evedb: AppDatabase, name_column: sqlalchemy.orm.InstrumentedAttribute, id_column: sqlalchemy.orm.InstrumentedAttribute, id: int, order_by: sqlalchemy.sql.ColumnElement | None = None, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        async with AppFunctions.session_scope(evedb, session) as session:
             query = (
-                sqlalchemy.select(AppTables.Character.name)
-                .where(AppTables.Character.character_id == character_id)
+                sqlalchemy.select(name_column)
+                .where(id_column == id)
                 .limit(1)
             )
+            if order_by is not None:
+                query = query.order_by(order_by)
 
             query_result: sqlalchemy.engine.Result = await session.execute(query)
             return query_result.scalar_one_or_none()
 
     @staticmethod
     @otel
-    async def get_corporation_name(evedb: AppDatabase, corporation_id: int) -> str:
-        async with await evedb.sessionmaker() as session:
-            query = (
-                sqlalchemy.select(AppTables.Corporation.name)
-                .where(AppTables.Corporation.corporation_id == corporation_id)
-                .limit(1)
-            )
-
-            query_result: sqlalchemy.engine.Result = await session.execute(query)
-            return query_result.scalar_one_or_none()
+    async def get_character_name(evedb: AppDatabase, character_id: int, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        return await AppFunctions.get_name(evedb, AppTables.Character.name, AppTables.Character.character_id, character_id, session=session)
 
     @staticmethod
     @otel
-    async def get_structure_name(evedb: AppDatabase, structure_id: int) -> str:
-        async with await evedb.sessionmaker() as session:
-            query = (
-                sqlalchemy.select(AppTables.StructureHistory.name)
-                .where(AppTables.StructureHistory.structure_id == structure_id)
-                .order_by(sqlalchemy.desc(AppTables.StructureHistory.timestamp))
-                .limit(1)
-            )
-
-            query_result: sqlalchemy.engine.Result = await session.execute(query)
-            return query_result.scalar_one_or_none()
+    async def get_corporation_name(evedb: AppDatabase, corporation_id: int, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        return await AppFunctions.get_name(evedb, AppTables.Corporation.name, AppTables.Corporation.corporation_id, corporation_id, session=session)
 
     @staticmethod
     @otel
-    async def get_system_name(evedb: AppDatabase, system_id: int) -> str:
-        async with await evedb.sessionmaker() as session:
-            query = (
-                sqlalchemy.select(AppTables.UniverseSystem.name)
-                .where(AppTables.UniverseSystem.system_id == system_id)
-                .limit(1)
-            )
-
-            query_result: sqlalchemy.engine.Result = await session.execute(query)
-            return query_result.scalar_one_or_none()
+    async def get_structure_name(evedb: AppDatabase, structure_id: int, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        return await AppFunctions.get_name(evedb, AppTables.StructureHistory.name, AppTables.StructureHistory.structure_id, structure_id, sqlalchemy.desc(AppTables.StructureHistory.timestamp), session=session)
 
     @staticmethod
     @otel
-    async def get_moon_name(evedb: AppDatabase, moon_id: int) -> str:
-        async with await evedb.sessionmaker() as session:
-            query = (
-                sqlalchemy.select(AppTables.UniverseMoon.name)
-                .where(AppTables.UniverseMoon.moon_id == moon_id)
-                .limit(1)
-            )
-
-            query_result: sqlalchemy.engine.Result = await session.execute(query)
-            return query_result.scalar_one_or_none()
+    async def get_system_name(evedb: AppDatabase, system_id: int, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        return await AppFunctions.get_name(evedb, AppTables.UniverseSystem.name, AppTables.UniverseSystem.system_id, system_id, session=session)
 
     @staticmethod
     @otel
-    async def get_type_name(evedb: AppDatabase, type_id: int) -> str:
-        async with await evedb.sessionmaker() as session:
-            query = (
-                sqlalchemy.select(AppTables.UniverseType.name)
-                .where(AppTables.UniverseType.type_id == type_id)
-                .limit(1)
-            )
+    async def get_moon_name(evedb: AppDatabase, moon_id: int, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        return await AppFunctions.get_name(evedb, AppTables.UniverseMoon.name, AppTables.UniverseMoon.moon_id, moon_id, session=session)
 
-            query_result: sqlalchemy.engine.Result = await session.execute(query)
-            return query_result.scalar_one_or_none()
+    @staticmethod
+    @otel
+    async def get_type_name(evedb: AppDatabase, type_id: int, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        return await AppFunctions.get_name(evedb, AppTables.UniverseType.name, AppTables.UniverseType.type_id, type_id, session=session)
 
     @staticmethod
     @otel
-    async def get_configuration(evedb: AppDatabase, key: str) -> str:
-        async with await evedb.sessionmaker() as session:
+    async def get_configuration(evedb: AppDatabase, key: str, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> str:
+        async with AppFunctions.session_scope(evedb, session) as session:
             query = (
                 sqlalchemy.select(AppTables.Configuration.value)
                 .where(AppTables.Configuration.key == key)
@@ -769,51 +852,70 @@ class AppFunctions:
 
             query_result: sqlalchemy.engine.Result = await session.execute(query)
             return query_result.scalar_one_or_none()
-            # return [x async for x in await session.stream_scalars(query)]
+
+    @staticmethod
+    def invalidate_acl_cache() -> None:
+        AppFunctions.ACL_CACHE = None
 
     @staticmethod
     @otel
-    async def is_permitted(evedb: AppDatabase, character_id: int, corpporation_id: int, alliance_id: int, check_trust: bool = False) -> bool:
-        acl_pass = False
+    async def get_access_controls(evedb: AppDatabase) -> dict[tuple[AppAccessType, int], AppTables.AccessControls]:
+        acl_cache = AppFunctions.ACL_CACHE
+        if acl_cache is not None and time.monotonic() - acl_cache[0] < AppFunctions.ACL_CACHE_LIFETIME:
+            return acl_cache[1]
 
-        async with await evedb.sessionmaker() as session:
-            session: sqlalchemy.ext.asyncio.AsyncSession
+        async with AppFunctions.ACL_CACHE_LOCK:
+            acl_cache = AppFunctions.ACL_CACHE
+            if acl_cache is not None and time.monotonic() - acl_cache[0] < AppFunctions.ACL_CACHE_LIFETIME:
+                return acl_cache[1]
 
-            acl_query = sqlalchemy.select(AppTables.AccessControls)
-            acl_set: typing.Final = {acl async for acl in await session.stream_scalars(acl_query)}
+            async with await evedb.sessionmaker() as session:
+                session: sqlalchemy.ext.asyncio.AsyncSession
 
-            acl_pass = False
-            acl_evaluations = [
-                (AppAccessType.ALLIANCE, alliance_id),
-                (AppAccessType.CORPORATION, corpporation_id),
-                (AppAccessType.CHARACTER, character_id),
-            ]
+                acl_query = sqlalchemy.select(AppTables.AccessControls)
+                query_result: sqlalchemy.engine.Result = await session.execute(acl_query)
+                acl_by_key: typing.Final = {(acl.type, acl.id): acl for acl in query_result.scalars().all()}
 
-            for acl_type, acl_id in acl_evaluations:
-                if not acl_id > 0:
-                    continue
-                for acl in filter(lambda x: x.type == acl_type, acl_set):
-                    if not isinstance(acl, AppTables.AccessControls):
-                        continue
-                    if acl_id == acl.id:
-                        acl_pass = acl.permit
-                        if check_trust:
-                            acl_pass = acl_pass and acl.trust
+            AppFunctions.ACL_CACHE = (time.monotonic(), acl_by_key)
+            return acl_by_key
 
-        return acl_pass
+    @staticmethod
+    def evaluate_acls(acl_by_key: dict[tuple[AppAccessType, int], AppTables.AccessControls], character_id: int, corpporation_id: int, alliance_id: int) -> tuple[bool, bool]:
+        acl_permit, acl_trust = False, False
+        acl_evaluations = [
+            (AppAccessType.ALLIANCE, alliance_id),
+            (AppAccessType.CORPORATION, corpporation_id),
+            (AppAccessType.CHARACTER, character_id),
+        ]
+
+        for acl_type, acl_id in acl_evaluations:
+            if not acl_id > 0:
+                continue
+            acl = acl_by_key.get((acl_type, acl_id))
+            if acl is not None:
+                acl_permit = acl.permit
+                acl_trust = acl.permit and acl.trust
+
+        return acl_permit, acl_trust
+
+    @staticmethod
+    @otel
+    async def is_permitted(evedb: AppDatabase, character_id: int, corpporation_id: int, alliance_id: int, check_trust: bool = False) -> bool:
+        acl_by_key: typing.Final = await AppFunctions.get_access_controls(evedb)
+        permitted, trusted = AppFunctions.evaluate_acls(acl_by_key, character_id, corpporation_id, alliance_id)
+        return trusted if check_trust else permitted
 
     @staticmethod
     @otel
-    async def is_contributor(evedb: AppDatabase, character_id: int, corpporation_id: int, alliance_id: int) -> bool:
-        if character_id in AppConstants.MAGIC_ADMINS | AppConstants.MAGIC_CONTRIBUTORS:
+    async def is_contributor(evedb: AppDatabase, character_id: int, corpporation_id: int, alliance_id: int, *, session: sqlalchemy.ext.asyncio.AsyncSession | None = None) -> bool:
+        if character_id in AppConstants.MAGIC_ADMINS_OR_CONTRIBUTORS:
             return True
 
-        is_permitted = await AppFunctions.is_permitted(evedb, character_id, corpporation_id, alliance_id, check_trust=False)
-        if is_permitted:
-            async with await evedb.sessionmaker() as session:
+        if await AppFunctions.is_permitted(evedb, character_id, corpporation_id, alliance_id, check_trust=False):
+            async with AppFunctions.session_scope(evedb, session) as session:
 
                 query = (
-                    sqlalchemy.select(AppTables.PeriodicCredentials)
+                    sqlalchemy.select(AppTables.PeriodicCredentials.character_id)
                     .where(
                         sqlalchemy.and_(
                             AppTables.PeriodicCredentials.is_enabled.is_(True),
@@ -823,7 +925,5 @@ class AppFunctions:
                 )
 
                 query_result: sqlalchemy.engine.Result = await session.execute(query)
-                obj = query_result.scalar_one_or_none()
-                if obj is not None:
-                    return True
+                return query_result.scalar_one_or_none() is not None
         return False
@@ -44,6 +44,12 @@ class AppTask(metaclass=abc.ABCMeta):
         else:
             client_session[self.name] = True
             self.task = asyncio.create_task(self.manage_task(client_session), name=self.__class__.__name__)
+            self.task.add_done_callback(self.task_done)
+
+    def task_done(self, task: asyncio.Task):
+        if not task.cancelled() and (ex := task.exception()) is not None:
+            otel_add_exception(ex)
+            self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {ex=}")
 
     async def manage_task(self, client_session: collections.abc.MutableMapping):
         try:
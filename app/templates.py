@@ -2,6 +2,7 @@ import datetime
 import enum
 import typing
 
+import cachetools
 import quart
 import quart.sessions
 
@@ -24,12 +25,14 @@ class AppTemplateCsacheEnum(enum.Enum):
 class AppTemplates:
 
     EVEDB: AppDatabase | None = None
+    CACHE_SIZE: typing.Final = 4096
+    CACHE_LIFETIME: typing.Final = 3600
     CACHE: typing.Final = {
-        AppTemplateCsacheEnum.CHARACTER_NAME: dict(),
-        AppTemplateCsacheEnum.CORPORATION_NAME: dict(),
-        AppTemplateCsacheEnum.MOON_NAME: dict(),
-        AppTemplateCsacheEnum.SYSTEM_NAME: dict(),
-        AppTemplateCsacheEnum.TYPE_NAME: dict(),
+        AppTemplateCsacheEnum.CHARACTER_NAME: cachetools.TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_LIFETIME),
+        AppTemplateCsacheEnum.CORPORATION_NAME: cachetools.TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_LIFETIME),
+        AppTemplateCsacheEnum.MOON_NAME: cachetools.TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_LIFETIME),
+        AppTemplateCsacheEnum.SYSTEM_NAME: cachetools.TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_LIFETIME),
+        AppTemplateCsacheEnum.TYPE_NAME: cachetools.TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_LIFETIME),
     }
 
     @staticmethod
@@ -1,6 +1,7 @@
 import asyncio
 import contextlib
 import datetime
+import hashlib
 import http
 import inspect
 import logging
@@ -10,10 +11,7 @@ import typing
 import uuid
 
 import colorlog
-import hypercorn.asyncio
-import hypercorn.config
-import hypercorn.middleware
-import opentelemetry.instrumentation.asgi
+import jinja2
 # import opentelemetry.trace
 import quart
 import quart.sessions
@@ -22,17 +20,22 @@ import quart_session
 from app import (AppAccessEvent, AppDatabase, AppESI, AppFunctions, AppRequest,
                  AppSSO, AppSSOHookProvider, AppTables, AppTask, AppTemplates,
                  CCPSSOProvider)
+from support.serialization import OrjsonProvider, OrjsonSessionSerializer
 from support.telemetry import otel, otel_initialize
-from tasks import (AppAccessControlTask, AppEventConsumerTask,
-                   AppMarketHistoryTask, AppMoonYieldTask,
-                   AppStructurePollingTask, ESIAllianceBackfillTask,
-                   ESINPCorporationBackfillTask,
+from tasks import (AppAccessControlTask, AppAccessHistoryTask,
+                   AppEventConsumerTask, AppMarketHistoryTask,
+                   AppMoonYieldTask, AppStructurePollingTask,
+                   ESIAllianceBackfillTask, ESINPCorporationBackfillTask,
                    ESIUniverseConstellationsBackfillTask,
                    ESIUniverseRegionsBackfillTask,
                    ESIUniverseSystemsBackfillTask)
 
 BASEDIR: typing.Final = os.path.dirname(os.path.realpath(__file__))
 
+_TIME_CHUNKING: typing.Final = 3
+_WEEKDAY_NAMES: typing.Final = ('M', 'T', 'W', 'T', 'F', 'S', 'S')
+_TIMEOFDAY_NAMES: typing.Final = tuple(f"{(x - _TIME_CHUNKING):02d}-{(x):02d}" for x in range(_TIME_CHUNKING, 24 + _TIME_CHUNKING, _TIME_CHUNKING))
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -62,7 +65,7 @@ app.config.from_mapping({
     "SESSION_COOKIE_SAMESITE": "Lax",
     "SESSION_COOKIE_SECURE": True,
 
-    "TEMPLATES_AUTO_RELOAD": True,
+    "TEMPLATES_AUTO_RELOAD": None,
     "SEND_FILE_MAX_AGE_DEFAULT": 300,
     "MAX_CONTENT_LENGTH": 512 * 1024,
     "BODY_TIMEOUT": 15,
@@ -70,7 +73,10 @@ app.config.from_mapping({
 })
 
 
+app.json = OrjsonProvider(app)
+
 quart_session.Session(app)
+app.session_interface.serializer = OrjsonSessionSerializer()
 
 esi: typing.Final = AppESI.factory(app.logger)
 db: typing.Final = AppDatabase(
@@ -78,6 +84,7 @@ db: typing.Final = AppDatabase(
     app.logger
 )
 eventqueue: typing.Final = asyncio.Queue()
+background_tasks: typing.Final[list[AppTask]] = list()
 sso = AppSSO(app, esi, db, eventqueue,
              client_id=os.getenv("ESI_CLIENT_ID", ""),
              provider=CCPSSOProvider(),
@@ -96,22 +103,42 @@ shutdown_event: typing.Final = asyncio.Event()
 @app.before_serving
 @otel
 async def _before_serving() -> None:
+    jinja_cache_directory: typing.Final = os.getenv("ESI_JINJA_CACHE_DIR", "")
+    try:
+        if len(jinja_cache_directory) > 0:
+            os.makedirs(jinja_cache_directory, exist_ok=True)
+            if not os.access(jinja_cache_directory, os.W_OK):
+                raise PermissionError(jinja_cache_directory)
+        app.jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache(jinja_cache_directory or None)
+    except (OSError, RuntimeError) as ex:
+        app.logger.warning(f"{inspect.currentframe().f_code.co_name}: jinja bytecode cache disabled: {ex=}")
+
     if not bool(evesession.get("setup_tasks_started", False)):
         evesession["setup_tasks_started"] = True
 
-        AppEventConsumerTask(evesession, esi, db, eventqueue, app.logger)
+        task_classes: typing.Final[tuple[type[AppTask], ...]] = (
+            AppEventConsumerTask,
+
+            ESIUniverseRegionsBackfillTask,
+            ESIUniverseConstellationsBackfillTask,
+            ESIUniverseSystemsBackfillTask,
+            ESIAllianceBackfillTask,
+            ESINPCorporationBackfillTask,
+
+            AppMarketHistoryTask,
+            AppAccessControlTask,
+            AppAccessHistoryTask,
+            AppMoonYieldTask,
+
+            AppStructurePollingTask,
+        )
 
-        ESIUniverseRegionsBackfillTask(evesession, esi, db, eventqueue, app.logger)
-        ESIUniverseConstellationsBackfillTask(evesession, esi, db, eventqueue, app.logger)
-        ESIUniverseSystemsBackfillTask(evesession, esi, db, eventqueue, app.logger)
-        ESIAllianceBackfillTask(evesession, esi, db, eventqueue, app.logger)
-        ESINPCorporationBackfillTask(evesession, esi, db, eventqueue, app.logger)
+        background_tasks.extend(task_class(evesession, esi, db, eventqueue, app.logger) for task_class in task_classes)
 
-        AppMarketHistoryTask(evesession, esi, db, eventqueue, app.logger)
-        AppAccessControlTask(evesession, esi, db, eventqueue, app.logger)
-        AppMoonYieldTask(evesession, esi, db, eventqueue, app.logger)
 
-        AppStructurePollingTask(evesession, esi, db, eventqueue, app.logger)
+@app.after_serving
+async def _after_serving() -> None:
+    await esi.close()
 
 
 @app.errorhandler(http.HTTPStatus.NOT_FOUND)
@@ -119,29 +146,35 @@ async def _404(_: Exception) -> quart.ResponseReturnValue:
     return await quart.render_template("404.html"), http.HTTPStatus.NOT_FOUND
 
 
+with open(os.path.join(app.static_folder, "robots.txt"), "rb") as ifp:
+    robots_bytes: typing.Final = ifp.read()
+robots_etag: typing.Final = hashlib.md5(robots_bytes).hexdigest()
+robots_headers: typing.Final = {"ETag": f'"{robots_etag}"', "Cache-Control": "public, max-age=86400"}
+
+
 @app.route('/robots.txt', methods=["GET"])
-@otel
 async def _robots() -> quart.ResponseReturnValue:
-    return await app.send_static_file('robots.txt')
+    if robots_etag in quart.request.if_none_match:
+        return "", http.HTTPStatus.NOT_MODIFIED, robots_headers
+    return quart.Response(robots_bytes, mimetype="text/plain", headers=robots_headers)
 
 
 @app.route("/usage/", methods=["GET"])
 @otel
 async def _usage() -> quart.ResponseReturnValue:
 
-    ar: typing.Final[AppRequest] = await AppFunctions.get_app_request(db, quart.session, quart.request)
+    ar: typing.Final[AppRequest] = await AppFunctions.get_cached_app_request(db, quart.session, quart.request)
     if ar.character_id > 0 and ar.suspect:
+        AppFunctions.invalidate_app_request(quart.session)
         quart.session.clear()
 
     elif ar.character_id > 0 and ar.permitted and ar.contributor:
 
-        permitted_data: typing.Final = list()
-        denied_data: typing.Final = list()
+        permitted_data = list()
+        denied_data = list()
 
         try:
-            async with await db.sessionmaker() as session:
-                permitted_data.extend(await AppFunctions.get_usage(session, True, ar.ts))
-                denied_data.extend(await AppFunctions.get_usage(session, False, ar.ts))
+            permitted_data, denied_data = await AppFunctions.usage_bundle(db, ar.ts)
 
         except Exception as ex:
             app.logger.error(f"{inspect.currentframe().f_code.co_name}: {ex=}")
@@ -165,7 +198,7 @@ async def _usage() -> quart.ResponseReturnValue:
 @otel
 async def _about() -> quart.ResponseReturnValue:
 
-    ar: typing.Final = await AppFunctions.get_app_request(db, quart.session, quart.request)
+    ar: typing.Final = await AppFunctions.get_cached_app_request(db, quart.session, quart.request)
 
     platform_info: typing.Final = {
         'python_version': platform.python_version(),
@@ -189,8 +222,9 @@ async def _about() -> quart.ResponseReturnValue:
 @otel
 async def _top(top_type: str) -> quart.ResponseReturnValue:
 
-    ar: typing.Final[AppRequest] = await AppFunctions.get_app_request(db, quart.session, quart.request)
+    ar: typing.Final[AppRequest] = await AppFunctions.get_cached_app_request(db, quart.session, quart.request)
     if ar.character_id > 0 and ar.suspect:
+        AppFunctions.invalidate_app_request(quart.session)
         quart.session.clear()
 
     elif ar.character_id > 0 and ar.permitted:
@@ -256,42 +290,35 @@ async def _top(top_type: str) -> quart.ResponseReturnValue:
 @otel
 async def _moon(moon_id: int) -> quart.ResponseReturnValue:
 
-    ar: typing.Final[AppRequest] = await AppFunctions.get_app_request(db, quart.session, quart.request)
+    ar: typing.Final[AppRequest] = await AppFunctions.get_cached_app_request(db, quart.session, quart.request)
     if ar.character_id > 0 and ar.suspect:
+        AppFunctions.invalidate_app_request(quart.session)
         quart.session.clear()
 
     elif ar.character_id > 0 and ar.permitted:
 
-        moon_extraction_history: typing.Final = list()
-        moon_mining_history: typing.Final = list()
+        moon_extraction_history = list()
+        moon_mining_history = list()
         moon_mining_history_timestamp = None
-        moon_yield: typing.Final = list()
+        moon_yield = list()
         mined_types_set = set()
         miner_list = list()
         mined_quantity_dict = dict()
-        mined_isk_dict: typing.Final = dict()
+        mined_isk_dict = dict()
         structure = None
 
         try:
-            async with await db.sessionmaker() as session:
-                structure = await AppFunctions.get_moon_structure(session, moon_id, ar.ts)
-                moon_yield.extend(await AppFunctions.get_moon_yield(session, moon_id, ar.ts))
-                moon_extraction_history.extend(await AppFunctions.get_moon_extraction_history(session, moon_id, ar.ts))
-                moon_mining_history_timestamp, mm_history, mm_isk = await AppFunctions.get_moon_mining_history(session, moon_id, ar.ts)
-                moon_mining_history.extend(mm_history)
-                mined_isk_dict.update(mm_isk)
+            structure, moon_yield, moon_extraction_history, mmh_results = await AppFunctions.moon_bundle(db, moon_id, ar.ts)
+            moon_mining_history_timestamp, moon_mining_history, mined_isk_dict = mmh_results
 
         except Exception as ex:
             app.logger.error(f"{inspect.currentframe().f_code.co_name}: {ex=}")
 
         if any([ar.contributor, ar.magic_character]):
-            for character_id, mining_history_dict in moon_mining_history:
-                for type_id in mining_history_dict.keys():
-                    mined_types_set.add(type_id)
-                miner_list.append(character_id)
-                mined_quantity_dict[character_id] = mining_history_dict
+            mined_quantity_dict = dict(moon_mining_history)
+            miner_list = list(mined_quantity_dict)
+            mined_types_set = set().union(*(d.keys() for d in mined_quantity_dict.values()))
 
-        time_chunking = 3
         return await quart.render_template(
             "moon.html",
             character_id=ar.character_id,
@@ -305,9 +332,9 @@ async def _moon(moon_id: int) -> quart.ResponseReturnValue:
             mined_quantity=mined_quantity_dict,
             mined_isk=mined_isk_dict,
             mined_quantity_timestamp=moon_mining_history_timestamp,
-            mined_types=sorted(list(mined_types_set)),
-            weekday_names=['M', 'T', 'W', 'T', 'F', 'S', 'S'],
-            timeofday_names=[f"{(x - time_chunking):02d}-{(x):02d}" for x in range(time_chunking, 24 + time_chunking) if x % time_chunking == 0],
+            mined_types=sorted(mined_types_set),
+            weekday_names=_WEEKDAY_NAMES,
+            timeofday_names=_TIMEOFDAY_NAMES,
         )
 
     elif ar.character_id > 0:
@@ -320,36 +347,33 @@ async def _moon(moon_id: int) -> quart.ResponseReturnValue:
 @otel
 async def _root() -> quart.ResponseReturnValue:
 
-    ar: typing.Final[AppRequest] = await AppFunctions.get_app_request(db, quart.session, quart.request)
+    ar: typing.Final[AppRequest] = await AppFunctions.get_cached_app_request(db, quart.session, quart.request)
     if ar.character_id > 0 and ar.suspect:
+        AppFunctions.invalidate_app_request(quart.session)
         quart.session.clear()
 
     elif ar.character_id > 0 and ar.permitted:
 
-        active_timer_results: typing.Final[list[AppTables.Structure]] = list()
-        completed_extraction_results: typing.Final = list()
-        scheduled_extraction_results: typing.Final = list()
-        unscheduled_extraction_results: typing.Final = list()
-        structure_fuel_results: typing.Final[list[AppTables.Structure]] = list()
-        structures_without_fuel_results: typing.Final[list[AppTables.Structure]] = list()
+        active_timer_results: list[AppTables.Structure] = list()
+        completed_extraction_results = list()
+        scheduled_extraction_results = list()
+        unscheduled_extraction_results = list()
+        structure_fuel_results: list[AppTables.Structure] = list()
+        structures_without_fuel_results: list[AppTables.Structure] = list()
         last_update_results: typing.Final = list()
         structure_counts: typing.Final = list()
 
         try:
-            async with await db.sessionmaker() as session:
-                active_timer_results.extend(await AppFunctions.get_active_timers(session, ar.ts))
-                completed_extraction_results.extend(await AppFunctions.get_completed_extractions(session, ar.ts))
-                scheduled_extraction_results.extend(await AppFunctions.get_scheduled_extractions(session, ar.ts))
-                unscheduled_extraction_results.extend(await AppFunctions.get_unscheduled_structures(session, ar.ts))
-                structure_fuel_results.extend(await AppFunctions.get_structure_fuel_expiries(session, ar.ts))
-                structures_without_fuel_results.extend(await AppFunctions.get_structures_without_fuel(session, ar.ts))
-                structure_count_dict: typing.Final = await AppFunctions.get_structure_counts(session, ar.ts)
-
-                last_refresh_times: typing.Final = await AppFunctions.get_refresh_times(session, ar.ts)
-                for obj in last_refresh_times:
-                    if obj.corporation_id in structure_count_dict.keys():
-                        last_update_results.append(obj)
-                        structure_counts.append(structure_count_dict[obj.corporation_id])
+            (
+                (active_timer_results, structure_fuel_results, structures_without_fuel_results),
+                completed_extraction_results, scheduled_extraction_results, unscheduled_extraction_results,
+                structure_count_dict, last_refresh_times
+            ) = await AppFunctions.dashboard_bundle(db, ar.ts)
+
+            for obj in last_refresh_times:
+                if obj.corporation_id in structure_count_dict.keys():
+                    last_update_results.append(obj)
+                    structure_counts.append(structure_count_dict[obj.corporation_id])
 
         except Exception as ex:
             app.logger.error(f"{inspect.currentframe().f_code.co_name}: {ex=}")
@@ -398,6 +422,10 @@ if __name__ == "__main__":
         app.run(host=app_host, port=app_port, debug=app_debug)
     else:
 
+        import hypercorn.asyncio
+        import hypercorn.config
+        import hypercorn.middleware
+
         app_trusted_hosts: typing.Final = ["127.0.0.1", "::1"]
         app_bind_hosts: typing.Final = [x for x in app_trusted_hosts]
 
@@ -420,6 +448,8 @@ if __name__ == "__main__":
         config.accesslog = "-"
 
         async def async_main():
+            import opentelemetry.instrumentation.asgi
+
             await db._initialize()
 
             app.asgi_app = opentelemetry.instrumentation.asgi.OpenTelemetryMiddleware(
@@ -0,0 +1,23 @@
+import typing
+
+import orjson
+import quart.json.provider
+
+
+class OrjsonProvider(quart.json.provider.DefaultJSONProvider):
+
+    def dumps(self, obj: typing.Any, **kwargs: typing.Any) -> str:
+        option: typing.Final = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s: str | bytes, **kwargs: typing.Any) -> typing.Any:
+        return orjson.loads(s)
+
+
+class OrjsonSessionSerializer:
+
+    def dumps(self, value: dict) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, value: str | bytes) -> dict:
+        return orjson.loads(value)
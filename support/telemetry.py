@@ -1,11 +1,11 @@
 import asyncio
 import functools
+import os
 import typing
 
 import opentelemetry.exporter.otlp.proto.http.metric_exporter
 import opentelemetry.exporter.otlp.proto.http.trace_exporter
 import opentelemetry.instrumentation.aiohttp_client
-import opentelemetry.instrumentation.asgi
 # import opentelemetry.instrumentation.asyncpg
 # import opentelemetry.instrumentation.jinja2
 import opentelemetry.instrumentation.sqlalchemy
@@ -16,22 +16,30 @@ import opentelemetry.sdk.metrics.export
 import opentelemetry.sdk.resources
 import opentelemetry.sdk.trace
 import opentelemetry.sdk.trace.export
+import opentelemetry.sdk.trace.sampling
 import opentelemetry.semconv.resource
 import opentelemetry.trace
 
+_OTEL_DISABLED: typing.Final = len(os.getenv("OTEL_DISABLED", "")) > 0
 _OTEL_INITIALIZED: bool = False
+_OTEL_SAMPLE_RATIO: typing.Final = 0.1
 
 
 def otel_initialize() -> opentelemetry.trace.Tracer:
 
     global _OTEL_INITIALIZED
-    if not _OTEL_INITIALIZED:
+    if not _OTEL_INITIALIZED and not _OTEL_DISABLED:
 
         trace_exporter: typing.Final = opentelemetry.exporter.otlp.proto.http.trace_exporter.OTLPSpanExporter()
 
         span_processor: typing.Final = opentelemetry.sdk.trace.export.BatchSpanProcessor(trace_exporter)
 
-        trace_provider: typing.Final = opentelemetry.sdk.trace.TracerProvider()
+        # Honour OTEL_TRACES_SAMPLER when set, otherwise sample a fraction of root spans.
+        sampler = None
+        if len(os.getenv("OTEL_TRACES_SAMPLER", "")) == 0:
+            sampler = opentelemetry.sdk.trace.sampling.ParentBased(opentelemetry.sdk.trace.sampling.TraceIdRatioBased(_OTEL_SAMPLE_RATIO))
+
+        trace_provider: typing.Final = opentelemetry.sdk.trace.TracerProvider(sampler=sampler)
 
         trace_provider.add_span_processor(span_processor)
 
@@ -84,6 +92,9 @@ def otel(func: typing.Callable[FuncParams, FuncReturns]) -> typing.Callable[Func
 
     global _OTEL_INITIALIZED
 
+    if _OTEL_DISABLED:
+        return func
+
     if _OTEL_INITIALIZED:
         if asyncio.iscoroutinefunction(func):
             @functools.wraps(func)
@@ -124,13 +135,15 @@ def otel_add_event(name: str, attributes: dict = dict()) -> None:
         span.add_event(name, attributes={f"event.{k}": v for k, v in attributes.items()})
 
 
-def otel_add_error(description: str | None = None) -> None:
+def otel_add_error(description: str | typing.Callable[[], str] | None = None) -> None:
     global _OTEL_INITIALIZED
     if not _OTEL_INITIALIZED:
         return
 
     span = opentelemetry.trace.get_current_span()
     if span.is_recording():
+        if callable(description):
+            description = description()
         span.set_status(status=opentelemetry.trace.StatusCode.ERROR, description=description)
 
 
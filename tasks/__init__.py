@@ -1,4 +1,5 @@
 from .app_access_control_task import AppAccessControlTask  # noqa: F401
+from .app_access_history_task import AppAccessHistoryTask  # noqa: F401
 from .app_moon_yield_task import AppMoonYieldTask  # noqa: F401
 from .app_notification_task import AppEventConsumerTask  # noqa: F401
 from .app_tasks import (AppMarketHistoryTask,  # noqa: F401
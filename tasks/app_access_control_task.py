@@ -9,7 +9,7 @@ import sqlalchemy.ext.asyncio.engine
 import sqlalchemy.orm
 import sqlalchemy.sql
 
-from app import AppAccessType, AppTables, AppTask
+from app import AppAccessType, AppFunctions, AppTables, AppTask
 from support.telemetry import otel, otel_add_exception
 
 
@@ -41,6 +41,8 @@ class AppAccessControlTask(AppTask):
 
                 await session.commit()
 
+            AppFunctions.invalidate_acl_cache()
+
         except Exception as ex:
             otel_add_exception(ex)
             self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {ex=}")
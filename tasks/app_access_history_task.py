@@ -0,0 +1,38 @@
+import asyncio
+import collections.abc
+import inspect
+import typing
+
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+
+from app import AppFunctions, AppTables, AppTask
+from support.telemetry import otel, otel_add_exception
+
+
+class AppAccessHistoryTask(AppTask):
+
+    BATCH_SIZE: typing.Final = 500
+    BATCH_WAIT: typing.Final = 0.1
+
+    @otel
+    async def run_once(self, access_history_list: list[AppTables.AccessHistory], /):
+        try:
+            async with await self.db.sessionmaker() as session, session.begin():
+                session: sqlalchemy.ext.asyncio.AsyncSession
+                session.add_all(access_history_list)
+                await session.commit()
+
+        except Exception as ex:
+            otel_add_exception(ex)
+            self.logger.error(f"- {self.__class__.__name__}.{inspect.currentframe().f_code.co_name}: {ex=}")
+
+    async def run(self, client_session: collections.abc.MutableMapping, /):
+        queue: typing.Final = AppFunctions.ACCESS_HISTORY_QUEUE
+        while True:
+            access_history_list = [await queue.get()]
+            await asyncio.sleep(self.BATCH_WAIT)
+            while not queue.empty() and len(access_history_list) < self.BATCH_SIZE:
+                access_history_list.append(queue.get_nowait())
+
+            await self.run_once(access_history_list)
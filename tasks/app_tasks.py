@@ -17,9 +17,9 @@ import sqlalchemy.ext.asyncio.engine
 import sqlalchemy.orm
 import sqlalchemy.sql
 
-from app import (AppConstants, AppDatabase, AppDatabaseTask, AppESI, AppTables,
-                 MoonExtractionCompletedEvent, MoonExtractionScheduledEvent,
-                 StructureStateChangedEvent)
+from app import (AppConstants, AppDatabase, AppDatabaseTask, AppESI,
+                 AppFunctions, AppTables, MoonExtractionCompletedEvent,
+                 MoonExtractionScheduledEvent, StructureStateChangedEvent)
 from support.telemetry import otel, otel_add_exception
 
 
@@ -1088,6 +1088,7 @@ class AppStructurePollingTask(AppStructureTask):
                 run_observers_result = True
                 if any([credentials.is_director_role, credentials.is_station_manager_role]):
                     run_structures_result = await self.run_structures(now, character_id, corporation_id, access_token)
+                    AppFunctions.invalidate_structure_counts()
                     run_extractions_result = await self.run_extractions(now, character_id, corporation_id, access_token)
 
                 if any([credentials.is_director_role, credentials.is_accountant_role]):
@@ -4,10 +4,9 @@ import http
 import inspect
 import typing
 
-import aiohttp
-import aiohttp.client_exceptions
 import opentelemetry.trace
 import sqlalchemy
+import sqlalchemy.dialects.postgresql
 import sqlalchemy.exc
 import sqlalchemy.ext.asyncio
 import sqlalchemy.ext.asyncio.engine
@@ -20,6 +19,8 @@ from support.telemetry import otel, otel_add_exception
 
 class ESIAlliancMemberTask(AppTask):
 
+    BATCH_SIZE: typing.Final = 500
+
     @otel
     async def run_once(self, client_session: collections.abc.MutableMapping, /):
 
@@ -33,12 +34,11 @@ class ESIAlliancMemberTask(AppTask):
             corporation_id_set.add(1000169)
 
         if alliance_id > 0:
-            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=AppConstants.ESI_LIMIT_PER_HOST)) as http_session:
-                url = f"{AppConstants.ESI_API_ROOT}{AppConstants.ESI_API_VERSION}/alliances/{alliance_id}/corporations/"
-                esi_result = await self.esi.get(http_session, url, request_params=self.request_params)
-                if esi_result.status in [http.HTTPStatus.OK, http.HTTPStatus.NOT_MODIFIED] and esi_result.data is not None:
-                    for corporation_id in list(esi_result.data):
-                        corporation_id_set.add(int(corporation_id))
+            http_session: typing.Final = self.esi.shared_http_session()
+            url = f"{AppConstants.ESI_API_ROOT}{AppConstants.ESI_API_VERSION}/alliances/{alliance_id}/corporations/"
+            esi_result = await self.esi.get(http_session, url, request_params=self.request_params)
+            if esi_result.status in [http.HTTPStatus.OK, http.HTTPStatus.NOT_MODIFIED] and esi_result.data is not None:
+                corporation_id_set.update(map(int, esi_result.data))
 
         if alliance_id > 0 and len(corporation_id_set) > 0:
 
@@ -46,17 +46,16 @@ class ESIAlliancMemberTask(AppTask):
                 async with await self.db.sessionmaker() as session:
                     session: sqlalchemy.ext.asyncio.AsyncSession
 
-                    session.begin()
-
                     query = (
                         sqlalchemy.delete(AppTables.AllianceCorporation)
                         .where(AppTables.AllianceCorporation.alliance_id == alliance_id)
                     )
                     await session.execute(query)
 
-                    obj_set = set()
-                    for corporation_id in corporation_id_set:
-                        session.add(AppTables.AllianceCorporation(alliance_id=alliance_id, corporation_id=corporation_id))
+                    await session.execute(
+                        sqlalchemy.insert(AppTables.AllianceCorporation),
+                        [{"alliance_id": alliance_id, "corporation_id": corporation_id} for corporation_id in corporation_id_set]
+                    )
 
                     await session.commit()
 
@@ -69,48 +68,56 @@ class ESIAlliancMemberTask(AppTask):
             try:
                 async with await self.db.sessionmaker() as session, session.begin():
 
-                    existing_corporation_id_set: typing.Final = set()
+                    query = sqlalchemy.select(AppTables.Corporation.corporation_id)
+                    query_result: sqlalchemy.engine.Result = await session.execute(query)
+                    existing_corporation_id_set: typing.Final = set(query_result.scalars().all())
+
+                    insert_query: typing.Final = (
+                        sqlalchemy.dialects.postgresql.insert(AppTables.Corporation)
+                        .on_conflict_do_nothing(index_elements=[AppTables.Corporation.corporation_id])
+                    )
+                    edict_list: typing.Final = list()
+
+                    http_session: typing.Final = self.esi.shared_http_session()
 
-                    query = sqlalchemy.select(AppTables.Corporation)
-                    async for obj in await session.stream_scalars(query):
-                        obj: AppTables.Corporation
-                        existing_corporation_id_set.add(obj)
+                    semaphore: typing.Final = asyncio.Semaphore(AppConstants.ESI_LIMIT_PER_HOST)
 
-                    obj_set = set()
+                    async def fetch(corporation_id: int) -> tuple[int, AppESIResult]:
+                        url = f"{AppConstants.ESI_API_ROOT}{AppConstants.ESI_API_VERSION}/corporations/{corporation_id}/"
+                        async with semaphore:
+                            return corporation_id, await self.esi.get(http_session, url, request_params=self.request_params)
 
-                    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=AppConstants.ESI_LIMIT_PER_HOST)) as http_session:
+                    task_list: typing.Final = [fetch(corporation_id) for corporation_id in corporation_id_set - existing_corporation_id_set]
 
-                        task_list: typing.Final = list()
-                        for corporation_id in corporation_id_set - existing_corporation_id_set:
-                            url = f"{AppConstants.ESI_API_ROOT}{AppConstants.ESI_API_VERSION}/corporations/{corporation_id}/"
-                            task_list.append(self.esi.get(http_session, url, request_params=self.request_params))
+                    if len(task_list) > 0:
+                        for esi_future in asyncio.as_completed(task_list):
+                            corporation_id, esi_result = await esi_future
+                            esi_result: AppESIResult
 
-                        if len(task_list) > 0:
-                            for esi_result in await asyncio.gather(*task_list):
-                                await asyncio.sleep(0)
-                                esi_result: AppESIResult
+                            if not esi_result:
+                                continue
 
-                                if not esi_result:
-                                    continue
+                            if esi_result.status in [http.HTTPStatus.OK, http.HTTPStatus.NOT_MODIFIED] and esi_result.data is not None:
+                                edict: typing.Final = dict({
+                                    "corporation_id": corporation_id,
+                                    "alliance_id": None,
+                                })
 
-                                if esi_result.status in [http.HTTPStatus.OK, http.HTTPStatus.NOT_MODIFIED] and esi_result.data is not None:
-                                    edict: typing.Final = dict({
-                                        "corporation_id": corporation_id
-                                    })
+                                for k, v in dict(esi_result.data).items():
+                                    if k in ["alliance_id"]:
+                                        v = int(v)
+                                    elif k not in ["name", "ticker"]:
+                                        continue
+                                    edict[k] = v
 
-                                    for k, v in dict(esi_result.data).items():
-                                        if k in ["alliance_id"]:
-                                            v = int(v)
-                                        elif k not in ["name", "ticker"]:
-                                            continue
-                                        edict[k] = v
+                                edict_list.append(edict)
 
-                                    obj = AppTables.Corporation(**edict)
-                                    obj_set.add(obj)
+                                if len(edict_list) >= self.BATCH_SIZE:
+                                    await session.execute(insert_query, edict_list)
+                                    edict_list.clear()
 
-                    if len(obj_set) > 0:
-                        session.add_all(obj_set)
-                        await session.commit()
+                    if len(edict_list) > 0:
+                        await session.execute(insert_query, edict_list)
 
             except Exception as ex:
                 otel_add_exception(ex)
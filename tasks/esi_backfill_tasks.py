@@ -92,7 +92,7 @@ class ESIBackfillTask(AppTask, metaclass=abc.ABCMeta):
 
         obj_id_set: typing.Final = set()
         if esi_result.status == http.HTTPStatus.OK and esi_result.data is not None:
-            obj_id_set.update(set(esi_result.data))
+            obj_id_set.update(map(int, esi_result.data))
 
         existing_obj_id_set: typing.Final = set()
 